@@ -0,0 +1,181 @@
+import numpy as np
+
+from solver import Areas, D_matrix, solver
+from task_generator import GenLameTask
+from mesh_generator import GenLameMesh
+
+
+def zz_indicator(solution):
+    """ Оценка погрешности по Зенкевичу-Жу для сетки из TRI3: в каждом элементе сравниваются постоянные напряжения
+        решения и восстановленные в узлах (node_stress), линейно интерполированные по элементу.
+        Возвращает вклады элементов в энергетическую норму погрешности (n_elems,) и энергетическую норму напряжений решения """
+    assert solution.elems.shape[1] == 3, 'zz indicator is implemented for TRI3 elements'
+
+    C = np.linalg.inv(D_matrix(solution.material['E'], solution.material['Nu']))
+    areas = Areas(solution.nodes[solution.elems])
+
+    # разность восстановленных и вычисленных напряжений в вершинах элемента, (n_elems, 3, 3)
+    d = solution.node_stress[solution.elems] - solution.elem_stress[:,None,:]
+
+    # для линейных в треугольнике u, v: интеграл u*v = Area/12*(sum u_i*v_i + sum u_i * sum v_i)
+    s = d.sum(axis=1)
+    error = areas/12*(np.einsum('eki,ij,ekj->e', d, C, d) + np.einsum('ei,ij,ej->e', s, C, s))
+
+    norm = np.einsum('ei,ij,ej,e->', solution.elem_stress, C, solution.elem_stress, areas)
+
+    return np.sqrt(np.maximum(error, 0)), np.sqrt(norm)
+
+
+def mark_elements(indicator, fraction=0.5):
+    """ Маркировка по Дёрфлеру: наименьшее множество элементов с наибольшими индикаторами,
+        дающее не меньше fraction от суммарного квадрата погрешности. Возвращает маску (n_elems,) """
+    order = np.argsort(indicator**2)[::-1]
+    total = np.cumsum(indicator[order]**2)
+
+    count = np.searchsorted(total, fraction*total[-1]) + 1
+
+    marked = np.zeros(len(indicator), dtype=bool)
+    marked[order[:count]] = True
+    return marked
+
+
+def refine_mesh(mesh, marked, boundary=None):
+    """ Измельчение сетки из TRI3 делением пополам по наибольшему ребру с сохранением согласованности:
+        у отмеченных элементов делится наибольшее ребро, а у соседей, чье ребро разделено, - тоже наибольшее
+        (и так до устойчивости). Элемент делится на 2, 3 или 4 части в зависимости от числа разделенных ребер.
+        В цепочки узлов краев mesh['edges'] вставляются новые узлы на разделенных ребрах границы,
+        boundary - словарь {имя края: функция, переносящая точки (n, 2) на криволинейную границу} """
+    nodes, elems = mesh['nodes'], np.asarray(mesh['elems'])
+    assert elems.shape[1] == 3, 'refinement is implemented for TRI3 elements'
+
+    n = len(nodes)
+
+    # ребра элемента: 0 - (0,1), 1 - (1,2), 2 - (2,0); ребро задается кодом min*n + max
+    def edge_codes(a, b):
+        return np.minimum(a, b)*n + np.maximum(a, b)
+
+    codes, edge_ids = np.unique(edge_codes(elems, elems[:,[1,2,0]]), return_inverse=True)
+    edge_ids = edge_ids.reshape(elems.shape)
+
+    lengths = np.linalg.norm(nodes[elems[:,[1,2,0]]] - nodes[elems], axis=2)
+    longest = lengths.argmax(axis=1)
+    longest_ids = edge_ids[np.arange(len(elems)), longest]
+
+    # замыкание: элемент с хотя бы одним разделенным ребром делит и свое наибольшее ребро
+    split = np.zeros(len(codes), dtype=bool)
+    split[longest_ids[marked]] = True
+    while True:
+        spread = split[edge_ids].any(axis=1) & ~split[longest_ids]
+        if not spread.any():
+            break
+        split[longest_ids[spread]] = True
+
+    # новые узлы на серединах разделенных ребер
+    ends = np.stack([codes[split] // n, codes[split] % n], axis=1)
+    mid = np.full(len(codes), -1, dtype=np.int64)
+    mid[split] = n + np.arange(split.sum())
+    new_nodes = np.concatenate([nodes, nodes[ends].mean(axis=1)])
+
+    # цепочки краев: новый узел вставляется между соседними узлами разделенного ребра
+    edges = {}
+    for name, chain in mesh['edges'].items():
+        chain = np.asarray(chain)
+        position = np.searchsorted(codes, edge_codes(chain[:-1], chain[1:]))
+        inserted = mid[position]
+
+        edges[name] = np.empty(2*len(chain)-1, dtype=np.int64)
+        edges[name][0::2] = chain
+        edges[name][1::2] = inserted
+        edges[name] = edges[name][edges[name] >= 0]
+
+        if boundary is not None and name in boundary:
+            moved = inserted[inserted >= 0]
+            new_nodes[moved] = boundary[name](new_nodes[moved])
+
+    # поворачиваем разделяемые элементы так, чтобы наибольшее ребро было ребром (a, b)
+    refined = split[longest_ids]
+    rotation = (np.arange(3) + longest[refined][:,None]) % 3
+    abc = np.take_along_axis(elems[refined], rotation, axis=1)
+    mids = mid[np.take_along_axis(edge_ids[refined], rotation, axis=1)]
+
+    a, b, c = abc.T
+    m, p, q = mids.T  # середины ребер ab, bc, ca
+
+    # наибольшее ребро делится всегда: [a, m, c] и [m, b, c]; затем половины делятся по ребрам ca и bc
+    split_ca = q >= 0
+    split_bc = p >= 0
+
+    new_elems = [
+        elems[~refined],
+        np.stack([a, m, c], axis=1)[~split_ca],
+        np.stack([c, q, m], axis=1)[split_ca],
+        np.stack([q, a, m], axis=1)[split_ca],
+        np.stack([m, b, c], axis=1)[~split_bc],
+        np.stack([b, p, m], axis=1)[split_bc],
+        np.stack([p, c, m], axis=1)[split_bc],
+    ]
+
+    return {
+        'nodes': new_nodes,
+        'elems': np.concatenate(new_elems),
+        'edges': edges,
+    }
+
+
+def lame_boundary(config_geometry):
+    """ Перенос новых узлов на дуги внутреннего и внешнего радиуса четверти кольца """
+    def on_circle(radius):
+        def project(points):
+            return points*(radius/np.linalg.norm(points, axis=1))[:,None]
+        return project
+
+    return {
+        'inner': on_circle(config_geometry['radius_min']),
+        'outer': on_circle(config_geometry['radius_max']),
+    }
+
+
+def adaptive_solve(mesh, make_task, tol=0.01, max_dofs=100000, fraction=0.5, boundary=None, max_steps=50):
+    """ Адаптивный расчет: решить задачу make_task(mesh), оценить погрешность индикатором zz_indicator,
+        измельчить отмеченные элементы и повторять, пока относительная оценка погрешности больше tol,
+        а число степеней свободы следующей сетки не превышает max_dofs.
+        Возвращает последнее решение, его сетку и историю шагов [{'dofs', 'error'}, ...] """
+    history = []
+
+    for _ in range(max_steps):
+        solution = solver(make_task(mesh))
+
+        indicator, norm = zz_indicator(solution)
+        error = np.sqrt((indicator**2).sum())
+        error = error/np.sqrt(norm**2 + error**2)
+
+        history.append({'dofs': 2*len(mesh['nodes']), 'error': error})
+
+        if error <= tol:
+            break
+
+        refined = refine_mesh(mesh, mark_elements(indicator, fraction), boundary)
+
+        if 2*len(refined['nodes']) > max_dofs:
+            break
+
+        mesh = refined
+
+    return solution, mesh, history
+
+
+def AdaptiveLameSolution(config):
+    """ Решение задачи Ламе на адаптивной сетке: начальная сетка строится по config['mesh'],
+        параметры адаптации (tol, max_dofs, fraction) берутся из config['adaptive'].
+        История шагов сохраняется в solution.solver_info['adaptive'] """
+    mesh = GenLameMesh(config['geometry'], config['mesh'])
+
+    def make_task(mesh):
+        return GenLameTask(mesh, config['material'], config['bcs'], config.get('solver'))
+
+    solution, _, history = adaptive_solve(
+        mesh, make_task, boundary=lame_boundary(config['geometry']), **config.get('adaptive', {})
+    )
+    solution.solver_info = dict(solution.solver_info or {}, adaptive=history)
+
+    return solution
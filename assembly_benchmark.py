@@ -0,0 +1,38 @@
+#-*- coding:utf-8 -*-
+import sys
+import time
+
+from mesh_generator import GenLameMesh
+from solver import D_matrix, assemble_stiffness
+
+
+def AssemblyBenchmark(resolution, workers_list=(1, 2, 4, 8), repeats=3):
+    """ Время сборки матрицы жесткости задачи Ламе в зависимости от числа процессов """
+    mesh = GenLameMesh({"radius_min":1, "radius_max":2}, {"resolution":resolution})
+
+    nodes, elems = mesh['nodes'], mesh['elems']
+    D = D_matrix(1, 0.25)
+
+    print('Сборка', len(elems), 'элементов,', 2*len(nodes), 'степеней свободы')
+
+    reference = assemble_stiffness(nodes, elems, D)
+
+    base = None
+
+    for workers in workers_list:
+        timings = []
+        for _ in range(repeats):
+            start = time.time()
+            K_global = assemble_stiffness(nodes, elems, D, workers=workers)
+            timings.append(time.time()-start)
+
+        assert abs(K_global-reference).max() <= 1e-12*abs(reference).max()
+
+        best = min(timings)
+        base = base or best
+
+        print('процессов', workers, 'время', round(best, 3), 'ускорение', round(base/best, 2))
+
+
+if __name__ == '__main__':
+    AssemblyBenchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from solver import LinearSystem, bcs_topology
+from storage import MANIFEST, CachedLameMesh, config_hash, load_solution, save_solution
+from task_generator import GenLameTask
+
+
+def nbytes(obj):
+    """ Примерный объем памяти, занятый массивами внутри объекта """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(value) for value in obj)
+    if hasattr(obj, 'nnz'):  # разреженная матрица или разложение SuperLU
+        if hasattr(obj, 'L'):
+            return 12*(obj.L.nnz+obj.U.nnz)
+        return 12*obj.nnz
+    if hasattr(obj, '__dict__'):
+        return sum(nbytes(value) for value in vars(obj).values())
+    return 0
+
+
+def topology_hash(bcs):
+    """ Хэш топологии гранусловий (типы, оси, узлы) без их значений """
+    digest = hashlib.sha256()
+    for kind, fix, nodes in bcs_topology(bcs):
+        digest.update(f'{kind}:{fix}:'.encode())
+        digest.update(nodes)
+    return digest.hexdigest()[:16]
+
+
+class LRUCache:
+    """ Кэш в памяти процесса с ограничением на суммарный объем: при переполнении вытесняются
+        давно не использованные записи. Объект больше max_bytes не кэшируется """
+
+    def __init__(self, max_bytes=1<<30):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key, default=None):
+        if key not in self.items:
+            return default
+        self.items.move_to_end(key)
+        return self.items[key][0]
+
+    def put(self, key, value, size=None):
+        size = nbytes(value) if size is None else size
+
+        if key in self.items:
+            self.size -= self.items.pop(key)[1]
+
+        if size > self.max_bytes:
+            return
+
+        self.items[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.items.popitem(last=False)
+            self.size -= evicted
+
+
+class LameCache:
+    """ Кэширование этапов задачи Ламе по хэшу соответствующих секций конфига:
+        mesh     - geometry + mesh (на диске и в памяти),
+        system   - сетка + material.Nu + топология гранусловий + solver (собранная и факторизованная система, только в памяти),
+        solution - весь конфиг (на диске и в памяти).
+        Серия расчетов, меняющая только bcs или E, переиспользует сетку и факторизацию """
+
+    def __init__(self, directory='cache', max_bytes=1<<30):
+        self.directory = directory
+        self.memory = LRUCache(max_bytes)
+
+    def _memoize(self, key, compute):
+        value = self.memory.get(key)
+        if value is None:
+            value = compute()
+            self.memory.put(key, value)
+        return value
+
+    def mesh(self, config):
+        key = 'mesh-'+config_hash(config['geometry'], config['mesh'])
+        return self._memoize(key, lambda: CachedLameMesh(config['geometry'], config['mesh'], self.directory))
+
+    def task(self, config):
+        return GenLameTask(self.mesh(config), config['material'], config['bcs'], config.get('solver'))
+
+    def system(self, config):
+        task = self.task(config)
+        key = 'system-'+config_hash(
+            config['geometry'], config['mesh'], config['material']['Nu'], config.get('solver')
+        )+topology_hash(task['bcs'])
+        return self._memoize(key, lambda: LinearSystem(task))
+
+    def solution(self, config):
+        key = 'solution-'+config_hash(config)
+        path = os.path.join(self.directory, key)
+
+        def compute():
+            if os.path.exists(os.path.join(path, MANIFEST)):
+                return load_solution(path)
+
+            solution = self.system(config).solve(self.task(config))
+            save_solution(path, solution)
+            return solution
+
+        return self._memoize(key, compute)
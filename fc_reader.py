@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 import json
+import mmap
+import re
 from base64 import b64decode
 
 import numpy as np
-import pandas as pd
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 from element_types import ELEMENT_TYPES
 
@@ -24,10 +30,111 @@ for ELEMENT_TYPE in ELEMENT_TYPES:
         FC_ELEMENT_TYPES[i] = ELEMENT_TYPE
 
 
+# число узлов и размерность элемента по его fc коду, для векторной обработки списков элементов
+FC_NODE_COUNTS = np.zeros(256, dtype=np.int64)
+FC_SITES = np.zeros(256, dtype=np.int64)
 
-class FCReader:
+for fc_id in FC_ELEMENT_TYPES:
+    FC_NODE_COUNTS[fc_id] = FC_ELEMENT_TYPES[fc_id]['nodes']
+    FC_SITES[fc_id] = FC_ELEMENT_TYPES[fc_id]['site']
+
+
+JSON_STRUCTURE = re.compile(rb'["{}\[\]]')
+JSON_SCALAR_END = re.compile(rb'[,}\]\s]')
+
+
+def skip_json_string(buf, pos):
+    """ Позиция сразу за строкой JSON, начинающейся в pos. Строка пропускается поиском кавычки,
+        без посимвольного разбора, поэтому длинные base64 блоки проходятся со скоростью memchr """
+    end = buf.find(b'"', pos+1)
+    while True:
+        # кавычка экранирована, если перед ней нечетное число обратных слэшей
+        slashes = 0
+        while buf[end-1-slashes] == 0x5c:
+            slashes += 1
+        if slashes % 2 == 0:
+            return end+1
+        end = buf.find(b'"', end+1)
+
+
+def skip_json_value(buf, pos):
+    """ Позиция сразу за значением JSON, начинающимся в pos """
+    if buf[pos] == 0x22: # "
+        return skip_json_string(buf, pos)
+
+    if buf[pos] not in b'{[':
+        return JSON_SCALAR_END.search(buf, pos).start()
+
+    depth = 0
+    while True:
+        token = JSON_STRUCTURE.search(buf, pos)
+        pos = token.start()
+        if buf[pos] == 0x22:
+            pos = skip_json_string(buf, pos)
+            continue
+        depth += 1 if buf[pos] in b'{[' else -1
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+def scan_sections(filepath, keys=None):
+    """ Разобрать верхнеуровневые секции keys JSON-объекта в файле (все, если keys=None).
+        Файл отображается в память, а значения остальных секций пропускаются без разбора и декодирования """
+    sections = {}
+
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        whitespace = re.compile(rb'\s*')
+
+        pos = whitespace.match(buf, 0).end()
+        assert buf[pos] == 0x7b, 'fc file must contain a JSON object' # {
+        pos = whitespace.match(buf, pos+1).end()
+
+        while buf[pos] != 0x7d: # }
+            end = skip_json_string(buf, pos)
+            key = json.loads(buf[pos:end])
+
+            pos = whitespace.match(buf, end).end()
+            assert buf[pos] == 0x3a # :
+            pos = whitespace.match(buf, pos+1).end()
+
+            end = skip_json_value(buf, pos)
+            if keys is None or key in keys:
+                sections[key] = json.loads(buf[pos:end])
+
+            pos = whitespace.match(buf, end).end()
+            if buf[pos] == 0x2c: # ,
+                pos = whitespace.match(buf, pos+1).end()
+
+    return sections
 
-    def __init__(self, filepath):
+
+
+class FCReader:
+    """ Чтение fc файла. В обычном режиме весь файл разбирается и декодируется сразу.
+        В ленивом режиме (lazy=True) каждая секция читается из файла и декодируется при первом обращении
+        к одноименному атрибуту (header, mesh, loads и т.д.), остальные секции при этом не разбираются """
+
+    SECTIONS = {
+        'header': '_decode_header',
+        'blocks': '_decode_blocks',
+        'coordinate_systems': '_decode_coordinate_systems',
+        'mesh': '_decode_mesh',
+        'settings': '_decode_settings',
+        'materials': '_decode_materials',
+        'loads': '_decode_loads',
+        'restraints': '_decode_restraints',
+        'sets': '_decode_sets',
+    }
+
+    def __init__(self, filepath, lazy=False):
+
+        self.filepath = filepath
+        self.lazy = lazy
+
+        if lazy:
+            self.src_data = {}
+            return
 
         with open(filepath, "r") as f:
             self.src_data = json.load(f)
@@ -49,6 +156,14 @@ class FCReader:
         return getattr(self,key)
 
 
+    def __getattr__(self, key):
+        # вызывается только для отсутствующих атрибутов, то есть для еще не декодированных секций
+        if self.__dict__.get('lazy') and key in FCReader.SECTIONS:
+            getattr(self, FCReader.SECTIONS[key])()
+            return self.__dict__[key]
+        raise AttributeError(key)
+
+
     def _decode_header(self):
         self.header = self.get_from_src('header')
         assert self.header
@@ -84,14 +199,25 @@ class FCReader:
         elems['id'] = decode(mesh['elemids'], np.int32)
         elems['nodes_list'] = decode(mesh['elems'], np.int32)
 
-        elems['nodes'] = []
+        # связность в CSR виде: узлы i-го элемента - nodes_list[offsets[i]:offsets[i+1]]
+        counts = FC_NODE_COUNTS[elems['type'].astype(np.uint8)]
 
-        counter = 0
+        elems['offsets'] = np.zeros(len(counts)+1, dtype=np.int64)
+        np.cumsum(counts, out=elems['offsets'][1:])
 
-        for elem_type in elems['type']:
-            count = FC_ELEMENT_TYPES[elem_type]['nodes']
-            elems['nodes'].append(elems['nodes_list'][counter:(counter+count)])
-            counter += count
+        assert elems['offsets'][-1] == len(elems['nodes_list'])
+
+        # для каждого типа элементов - номера элементов и плотная таблица их узлов (n, k)
+        elems['by_type'] = {}
+
+        for elem_type in np.unique(elems['type']):
+            index = np.flatnonzero(elems['type'] == elem_type)
+            count = FC_NODE_COUNTS[np.uint8(elem_type)]
+
+            elems['by_type'][int(elem_type)] = {
+                'index': index,
+                'nodes': elems['nodes_list'][elems['offsets'][index][:,None] + np.arange(count)],
+            }
 
         nodes = {}
         nodes['id'] = decode(mesh['nids'], np.int32)
@@ -100,16 +226,39 @@ class FCReader:
         assert mesh['elems_count'] == len(elems['id'])
         assert mesh['nodes_count'] == len(nodes['id'])
 
-        self.mesh = {}
+        self.mesh = {
+            'nodes': nodes,
+            'elems': elems,
+        }
+
+
+    def elem_nodes(self, i):
+        """ Узлы i-го (по порядку в файле) элемента """
+        elems = self.mesh['elems']
+        return elems['nodes_list'][elems['offsets'][i]:elems['offsets'][i+1]]
 
-        self.mesh['nodes'] = pd.DataFrame(data=nodes['xyz'], columns=['x','y','z'], index=nodes['id'])
 
-        self.mesh['elems'] = pd.DataFrame(data={
+    @property
+    def nodes_frame(self):
+        """ Узлы в виде pandas.DataFrame (x, y, z) с индексом по id узла """
+        if pd is None:
+            raise ImportError("nodes_frame requires pandas")
+        nodes = self.mesh['nodes']
+        return pd.DataFrame(data=nodes['xyz'], columns=['x','y','z'], index=nodes['id'])
+
+
+    @property
+    def elems_frame(self):
+        """ Элементы в виде pandas.DataFrame с индексом по id элемента """
+        if pd is None:
+            raise ImportError("elems_frame requires pandas")
+        elems = self.mesh['elems']
+        return pd.DataFrame(data={
             'block': elems['block'],
             'order': elems['order'],
             'parent_id': elems['parent_id'],
             'type': elems['type'],
-            'nodes': elems['nodes']
+            'nodes': np.split(elems['nodes_list'], elems['offsets'][1:-1])
         }, index=elems['id'])
 
 
@@ -120,7 +269,7 @@ class FCReader:
         })
 
         for nodeset in self.sets['nodesets']:
-            nodeset['apply_to'] = decode(nodeset['apply_to'], np.int32).reshape(sideset['apply_to_size'],-1)
+            nodeset['apply_to'] = decode(nodeset['apply_to'], np.int32).reshape(nodeset['apply_to_size'],-1)
 
         for sideset in self.sets['sidesets']:
             sideset['apply_to'] = decode(sideset['apply_to'], np.int32).reshape(sideset['apply_to_size'],-1)
@@ -158,47 +307,86 @@ class FCReader:
 
 
     def get_from_src(self, key, default=None):
+        if self.lazy:
+            # исходные данные секции не сохраняются: после декодирования они больше не нужны
+            return scan_sections(self.filepath, [key]).get(key, default)
         return self.src_data.get(key, default)
 
 
     def stream_fragments(self, dim, rank, index_replace=None):
-        index_replace_local = {el:i for i,el in enumerate(self.mesh['nodes'].index.tolist())}
+        """ Поток фрагментов размерности rank (узлы, ребра, треугольники, тетраэдры) элементов размерности
+            от rank до dim в виде одного int32 массива. Подряд идущие элементы одного блока и одной размерности
+            образуют группу с заголовком [dim, block, site, rank, число фрагментов], за которым следуют
+            фрагменты по rank+1 индексу узла. index_replace - словарь или массив перевода id узла в индекс,
+            по умолчанию - порядковый номер узла в файле """
+        elems = self.mesh['elems']
+        node_ids = self.mesh['nodes']['id']
+
+        if isinstance(index_replace, np.ndarray):
+            lookup = index_replace
+        else:
+            if index_replace is None:
+                keys, values = node_ids, np.arange(len(node_ids))
+            else:
+                keys = np.fromiter(index_replace.keys(), dtype=np.int64, count=len(index_replace))
+                values = np.fromiter(index_replace.values(), dtype=np.int64, count=len(index_replace))
 
-        if index_replace is None:
-            index_replace = index_replace_local
+            # id, которых нет в таблице, переводятся в -1 и ловятся при сборке потока
+            lookup = np.full(keys.max()+1, -1, dtype=np.int32)
+            lookup[keys] = values
 
-        fragments = []
+        types = elems['type']
+        sites = FC_SITES[types.astype(np.uint8)]
 
-        title = None
+        # отбор зависит только от типа, поэтому элементы каждого типа берутся либо все, либо никакие
+        selected = np.flatnonzero((sites <= dim) & (sites >= rank))
 
-        for element in self.mesh['elems'].iloc:
-            element_type = FC_ELEMENT_TYPES[element['type']]
+        if len(selected) == 0:
+            return np.zeros(0, dtype=np.int32)
 
-            if dim < element_type['site'] or element_type['site'] < rank:
-                continue;
+        selected_types = types[selected]
+        selected_sites = sites[selected]
+        selected_blocks = elems['block'][selected]
 
-            element_structure = element_type['structure'][rank]
+        lengths = np.zeros(len(selected), dtype=np.int64)
+        for elem_type in np.unique(selected_types):
+            lengths[selected_types == elem_type] = len(FC_ELEMENT_TYPES[elem_type]['structure'][rank])
 
-            element_parts = np.copy(element_structure)
-            nodes = element['nodes']
+        # начало новой группы - смена блока или размерности элемента
+        group_start = np.ones(len(selected), dtype=bool)
+        group_start[1:] = (selected_blocks[1:] != selected_blocks[:-1]) | (selected_sites[1:] != selected_sites[:-1])
 
-            for i, el in enumerate(nodes):
-                element_parts[element_structure==i] = index_replace[el]
+        sizes = lengths + 5*group_start
+        starts = np.cumsum(sizes) - sizes
 
-            element_parts = element_parts.reshape((-1,rank+1))
+        stream = np.empty(sizes.sum(), dtype=np.int32)
 
-            if title and title[1] == element['block'] and title[2] == element_type['site']:
-                title[4] += len(element_parts)
-            else:
-                title = [dim, element['block'], element_type['site'], rank, len(element_parts)]
+        groups = np.flatnonzero(group_start)
+
+        titles = np.empty((len(groups), 5), dtype=np.int32)
+        titles[:,0] = dim
+        titles[:,1] = selected_blocks[groups]
+        titles[:,2] = selected_sites[groups]
+        titles[:,3] = rank
+        titles[:,4] = np.add.reduceat(lengths//(rank+1), groups)
+
+        stream[starts[groups][:,None] + np.arange(5)] = titles
+
+        data_starts = starts + 5*group_start
+
+        for elem_type in np.unique(selected_types):
+            element_structure = FC_ELEMENT_TYPES[elem_type]['structure'][rank]
+            nodes = elems['by_type'][int(elem_type)]['nodes']
+
+            members = selected_types == elem_type
 
-                fragments.append(title)
+            fragment_ids = nodes[:,element_structure]
+            assert fragment_ids.max() < len(lookup), 'element refers to unknown node id'
 
-            fragments.extend(element_parts)
+            fragments = lookup[fragment_ids]
+            assert (fragments >= 0).all(), 'element refers to unknown node id'
 
-        stream = []
-        for a in fragments:
-            stream.extend(a)
+            stream[data_starts[members][:,None] + np.arange(len(element_structure))] = fragments
 
         return stream
 
@@ -225,7 +413,7 @@ if __name__ == '__main__':
     # print(fc_vol_data.stream_tetras())
     # print(test_data.stream_fragments(2))
     # print(fc_curve_data.stream_pairs())
-    # print(test_data.mesh['elems']['type'].unique())
+    # print(np.unique(test_data.mesh['elems']['type']))
 
     # print(fc_data['loads'])
     # print(fc_data['restraints'])
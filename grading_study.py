@@ -0,0 +1,52 @@
+#-*- coding:utf-8 -*-
+import sys
+
+import numpy as np
+
+from mesh_generator import GenLameMesh
+from solver import solver
+from task_generator import GenLameTask
+from tester import AnaliticalLameStress
+
+
+def GradingStudy(resolutions=(5, 10, 20, 40), gradings=(1, 2, 4, 8), points=21, angles=5):
+    """ Погрешность напряжений задачи Ламе в зависимости от числа степеней свободы
+        для равномерных (grading=1) и сгущающихся к внутреннему радиусу слоев сетки.
+        Погрешность - максимум модуля разности с аналитическим решением по сетке точек (радиус x угол),
+        отнесенный к максимуму модуля аналитических напряжений """
+    config = {
+        "geometry": {"radius_min":1, "radius_max":2},
+        "material": {"E":2*10**11, "Nu":0.25},
+        "bcs": {"pressure_inner":1.0, "pressure_outer":2.0},
+    }
+    a, b = config['geometry']['radius_min'], config['geometry']['radius_max']
+
+    # точки берем строго внутри области: внешнюю дугу сетка приближает хордами, а на краях поиск элемента неустойчив
+    r, fi = np.meshgrid(
+        np.linspace(a*(1+1e-6), b*np.cos(np.pi/4/min(resolutions)), points),
+        (np.arange(angles)+0.5)/angles*np.pi/2,
+    )
+    r, fi = r.ravel(), fi.ravel()
+
+    # аналитические напряжения в декартовых координатах
+    s_rr, s_ff, _ = AnaliticalLameStress(a, b, config['bcs']['pressure_inner'], config['bcs']['pressure_outer'])(r)
+    c, s = np.cos(fi), np.sin(fi)
+    exact = np.stack([s_rr*c**2 + s_ff*s**2, s_rr*s**2 + s_ff*c**2, (s_rr-s_ff)*s*c], axis=1)
+
+    coords = np.stack([r*c, r*s], axis=1)
+
+    print('resolution', 'grading', 'dofs', 'error', sep='\t')
+
+    for resolution in resolutions:
+        for grading in gradings:
+            mesh = GenLameMesh(config['geometry'], {"resolution":resolution, "grading":grading})
+            solution = solver(GenLameTask(mesh, config['material'], config['bcs']))
+
+            stress = solution.evaluate(coords)['stress']
+            error = np.abs(stress-exact).max()/np.abs(exact).max()
+
+            print(resolution, grading, 2*solution.len, f'{100*error:.2f}%', sep='\t')
+
+
+if __name__ == '__main__':
+    GradingStudy(tuple(int(x) for x in sys.argv[1:]) or (5, 10, 20, 40))
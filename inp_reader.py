@@ -0,0 +1,81 @@
+import re
+
+import numpy as np
+
+
+# строки комментариев inp, в том числе внутри блоков данных
+INP_COMMENT = re.compile(r'^\*\*.*(\n|$)', re.MULTILINE)
+
+
+def parse_numbers(text, dtype=float):
+    """ Разобрать числовой блок inp (числа через запятые и переводы строк) одним вызовом """
+    return np.fromstring(text.replace(',', ' '), dtype=dtype, sep=' ')
+
+
+def parse_keyword(line):
+    """ Ключевое слово и параметры строки вида '*ELEMENT, TYPE=STRI3' """
+    parts = [part.strip() for part in line.split(',')]
+    params = {}
+    for part in parts[1:]:
+        key, _, value = part.partition('=')
+        params[key.strip().upper()] = value.strip()
+    return parts[0].upper(), params
+
+
+def inp2mesh(file):
+    """ Прочитать сетку из inp файла (блоки *NODE, *ELEMENT и *NSET) в словарь {'nodes','elems','edges'}.
+        file - путь или открытый текстовый файл. Номера узлов в файле переводятся в плотные индексы массива nodes """
+
+    if isinstance(file, str):
+        with open(file, "r") as read_file:
+            return inp2mesh(read_file)
+
+    nodes = []
+    elems = []
+    edges = {}
+
+    # комментарии убираются до разбиения на блоки, иначе комментарий внутри блока обрывал бы его
+    text = INP_COMMENT.sub('', file.read())
+
+    for section in ('\n'+text).split('\n*')[1:]:
+        header, _, body = section.partition('\n')
+
+        keyword, params = parse_keyword(header)
+
+        if keyword == 'NODE':
+            columns = len(body.partition('\n')[0].split(','))
+            nodes.append(parse_numbers(body).reshape(-1, columns))
+
+        if keyword == 'ELEMENT':
+            columns = len(body.partition('\n')[0].split(','))
+            elems.append(parse_numbers(body, np.int64).reshape(-1, columns)[:,1:])
+
+        if keyword == 'NSET':
+            ids = parse_numbers(body, np.int64)
+            if 'GENERATE' in params:
+                ids = np.arange(ids[0], ids[1]+1, ids[2] if len(ids) > 2 else 1)
+            edges[params['NSET']] = ids
+
+    nodes = np.concatenate(nodes) if nodes else np.zeros((0, 3))
+    elems = np.concatenate(elems) if elems else np.zeros((0, 3), dtype=np.int64)
+
+    ids = nodes[:,0].astype(np.int64)
+    nodes = nodes[:,1:]
+
+    if not np.array_equal(ids, np.arange(len(ids))):
+        # номера узлов в файле произвольные - переводим их в индексы через сортировку
+        order = np.argsort(ids)
+
+        def remap(x):
+            position = np.minimum(np.searchsorted(ids, x, sorter=order), len(ids)-1)
+            assert (ids[order[position]] == x).all(), 'inp refers to a node missing from *NODE'
+            return order[position]
+
+        elems = remap(elems)
+        edges = {name: remap(nset) for name, nset in edges.items()}
+
+    return {
+        'nodes': nodes,
+        'elems': elems,
+        'edges': edges,
+    }
@@ -1,23 +1,54 @@
+import numpy as np
 
-def mesh2inp(mesh):
 
-    file_data = []
+# тип элемента inp по числу узлов треугольника
+INP_ELEMENT_TYPES = {3: 'STRI3', 6: 'STRI65'}
 
-    file_data.append("*PART, NAME=Part-Default")
-    file_data.append("*NODE")
-    
-    for i, node in enumerate(mesh['nodes']):
-        file_data.append(f"{i}, {node[0]}, {node[1]}")
 
-    file_data.append("*ELEMENT, TYPE=STRI3")
+def write_rows(file, fmt, rows, chunk_size):
+    """ Записать строки таблицы rows кусками по chunk_size строк; каждый кусок форматируется одной операцией """
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start+chunk_size]
+        file.write((fmt*len(chunk)) % tuple(chunk.ravel().tolist()))
 
-    for i, elem in enumerate(mesh['elems']):
-        file_data.append(f"{i}, {elem[0]}, {elem[1]}, {elem[2]}")
 
-    file_data.append("*END PART")
-    file_data.append("*ASSEMBLY, NAME=ASSEMBLY1")
-    file_data.append("*INSTANCE, NAME=Part-Default_1, PART=Part-Default")
-    file_data.append("*END INSTANCE")
-    file_data.append("*END ASSEMBLY")
+def write_set(file, ids, chunk_size, per_line=16):
+    """ Записать номера узлов множества по per_line в строке """
+    ids = np.asarray(ids)
+    full = len(ids)//per_line*per_line
 
-    return '\n'.join(file_data)
\ No newline at end of file
+    write_rows(file, ", ".join(["%d"]*per_line)+"\n", ids[:full].reshape(-1, per_line), chunk_size)
+
+    if full < len(ids):
+        file.write(", ".join(map(str, ids[full:].tolist()))+"\n")
+
+
+def mesh2inp(mesh, file, chunk_size=100000):
+    """ Записать сетку в inp файл; file - путь или открытый текстовый файл.
+        Узлы и элементы пишутся кусками, поэтому расход памяти не зависит от размера сетки """
+
+    if isinstance(file, str):
+        with open(file, "w", buffering=1<<20) as write_file:
+            return mesh2inp(mesh, write_file, chunk_size)
+
+    nodes = np.asarray(mesh['nodes'])
+    elems = np.asarray(mesh['elems'])
+
+    file.write("*PART, NAME=Part-Default\n")
+    file.write("*NODE\n")
+
+    write_rows(file, "%d, %r, %r\n", np.column_stack([np.arange(len(nodes)), nodes]), chunk_size)
+
+    file.write(f"*ELEMENT, TYPE={INP_ELEMENT_TYPES[elems.shape[1]]}\n")
+
+    write_rows(file, ", ".join(["%d"]*(elems.shape[1]+1))+"\n", np.column_stack([np.arange(len(elems)), elems]), chunk_size)
+
+    for name, ids in mesh.get('edges', {}).items():
+        file.write(f"*NSET, NSET={name}\n")
+        write_set(file, ids, chunk_size)
+
+    file.write("*END PART\n")
+    file.write("*ASSEMBLY, NAME=ASSEMBLY1\n")
+    file.write("*INSTANCE, NAME=Part-Default_1, PART=Part-Default\n")
+    file.write("*END INSTANCE\n")
+    file.write("*END ASSEMBLY\n")
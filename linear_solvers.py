@@ -0,0 +1,126 @@
+import time
+import warnings
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, cg, spilu, splu
+
+try:
+    from sksparse.cholmod import cholesky
+except ImportError:
+    cholesky = None
+
+try:
+    import pyamg
+except ImportError:
+    pyamg = None
+
+
+METHODS = ['direct', 'cholesky', 'cg']
+
+PRECONDITIONERS = ['none', 'jacobi', 'ilu', 'amg']
+
+
+def jacobi_preconditioner(K):
+    """ Диагональный предобуславливатель """
+    return sparse.diags(1/K.diagonal())
+
+
+def ilu_preconditioner(K, drop_tol=1e-4, fill_factor=10):
+    """ Неполное LU разложение в виде линейного оператора.
+        Симметричное упорядочение без выбора ведущего элемента, иначе предобуславливатель несимметричен и CG расходится """
+    ilu = spilu(K.tocsc(), drop_tol=drop_tol, fill_factor=fill_factor,
+        permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0, options={'SymmetricMode': True})
+    return LinearOperator(K.shape, ilu.solve)
+
+
+def amg_preconditioner(K):
+    """ Алгебраический многосеточный предобуславливатель (нужен пакет pyamg) """
+    if pyamg is None:
+        raise ImportError("amg preconditioner requires pyamg")
+    return pyamg.smoothed_aggregation_solver(K).aspreconditioner()
+
+
+class LinearSolver:
+    """ Решатель системы K U = F с выбираемым методом:
+        direct - разреженное LU разложение (SuperLU),
+        cholesky - разреженное разложение Холецкого (нужен пакет scikit-sparse),
+        cg - метод сопряженных градиентов с предобуславливателем none/jacobi/ilu/amg.
+        Подготовка (факторизация или построение предобуславливателя) выполняется один раз в конструкторе,
+        статистика последнего решения хранится в info (для блока правых частей - суммарное число итераций
+        и максимальная по столбцам невязка). """
+
+    def __init__(self, K, method='direct', preconditioner='jacobi', tol=1e-10, maxiter=None):
+        assert method in METHODS, f'unknown linear solver {method}'
+        assert preconditioner in PRECONDITIONERS, f'unknown preconditioner {preconditioner}'
+
+        self.K = K.tocsr()
+        self.method = method
+        self.preconditioner = preconditioner
+        self.tol = tol
+        self.maxiter = maxiter
+
+        start = time.time()
+
+        if method == 'direct':
+            self._factor = splu(self.K.tocsc())
+
+        if method == 'cholesky':
+            if cholesky is None:
+                raise ImportError("cholesky solver requires scikit-sparse")
+            self._factor = cholesky(self.K.tocsc())
+
+        if method == 'cg':
+            self._M = {
+                'none': lambda K: None,
+                'jacobi': jacobi_preconditioner,
+                'ilu': ilu_preconditioner,
+                'amg': amg_preconditioner,
+            }[preconditioner](self.K)
+
+        self.info = {
+            'method': method if method != 'cg' else f'cg+{preconditioner}',
+            'setup_time': time.time()-start,
+            'solve_time': 0,
+            'iterations': None,
+            'residual': None,
+        }
+
+    def solve(self, F):
+        """ Решить систему для правой части F. Если F - блок формы (N, k), решаются все k столбцов сразу
+            и возвращается блок той же формы, иначе возвращается вектор U """
+        F = np.asarray(F, dtype=float)
+        F = F.reshape((F.shape[0], -1))
+
+        start = time.time()
+
+        if self.method == 'cg':
+            U = np.zeros(F.shape)
+            iterations = [0]
+
+            def count(xk):
+                iterations[0] += 1
+
+            converged = True
+            for k in range(F.shape[1]):
+                U[:,k], status = cg(self.K, F[:,k], rtol=self.tol, maxiter=self.maxiter, M=self._M, callback=count)
+                assert status >= 0, 'cg breakdown'
+                converged = converged and status == 0
+
+            self.info['iterations'] = iterations[0]
+            self.info['converged'] = converged
+
+            if not converged:
+                warnings.warn(
+                    f'cg did not converge to tol={self.tol} in {iterations[0]} iterations (maxiter={self.maxiter}), '
+                    'the solution is inaccurate', RuntimeWarning, stacklevel=2
+                )
+        else:
+            U = self._factor.solve_A(F) if self.method == 'cholesky' else self._factor.solve(F)
+
+        self.info['solve_time'] = time.time()-start
+
+        norm = np.linalg.norm(F, axis=0)
+        self.info['residual'] = (np.linalg.norm(F-self.K.dot(U), axis=0)/np.where(norm, norm, 1)).max()
+
+        return U if U.shape[1] > 1 else U[:,0]
@@ -1,9 +1,7 @@
 #-*- coding:utf-8 -*-
-from mesh_generator import GenLameMesh
-from task_generator import GenLameTask
+from cache import LameCache
 from inp_writer import mesh2inp
 
-from solver import solver
 from tester import LameTest
 
 config = {
@@ -21,17 +19,21 @@ config = {
     "bcs":{
         "pressure_inner":1.0,
         "pressure_outer":2.0
+    },
+    "solver":{
+        "method":"direct",
     }
 }
 
-mesh = GenLameMesh(config["geometry"], config["mesh"])
+if __name__ == '__main__':
 
-with open("task.inp", "w") as write_file:
-    write_file.write(mesh2inp(mesh)) 
+    # сетка, факторизация и решение кэшируются по хэшу соответствующих секций конфига (в памяти и в каталоге cache)
+    cache = LameCache()
 
-task = GenLameTask(mesh, config["material"], config["bcs"])
+    mesh = cache.mesh(config)
 
-solution = solver(task)
+    mesh2inp(mesh, "task.inp")
 
-LameTest(solution, config)
+    solution = cache.solution(config)
 
+    LameTest(solution, config)
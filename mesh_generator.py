@@ -1,16 +1,71 @@
 #-*- coding:utf-8 -*-
-from math import pi, sin, cos
+from math import pi
 
 import numpy as np
 
 
 def polar2сartesian(r, fi):
-    """ Перевод из полярной системы координат в декартову"""
+    """ Перевод из полярной системы координат в декартову (fi - доля прямого угла), работает и на массивах"""
     fi = fi*pi/2
-    return [r*cos(fi), r*sin(fi)]
+    return np.stack([r*np.cos(fi), r*np.sin(fi)], axis=-1)
 
 
-def GenLameMesh(config_geometry, config_mesh):
+def quadratic_mesh(mesh):
+    """ Сетка из TRI6 по сетке из TRI3: на середине каждого ребра добавляется узел (ребра остаются прямыми).
+        Узлы элемента - вершины, затем середины ребер 0-1, 1-2, 2-0; в цепочки узлов краев между соседними узлами
+        вставляются середины соединяющих их ребер """
+    nodes, elems = mesh['nodes'], np.asarray(mesh['elems'])
+
+    # ребро задается кодом min*n + max, общий у соседних элементов
+    def edge_codes(a, b):
+        return np.minimum(a, b)*len(nodes) + np.maximum(a, b)
+
+    codes, inverse = np.unique(edge_codes(elems, elems[:,[1,2,0]]), return_inverse=True)
+    ends = np.stack([codes // len(nodes), codes % len(nodes)], axis=1)
+
+    def mid_nodes(a, b):
+        return len(nodes) + np.searchsorted(codes, edge_codes(a, b))
+
+    edges = {}
+    for name, chain in mesh['edges'].items():
+        chain = np.asarray(chain)
+        edges[name] = np.empty(2*len(chain)-1, dtype=np.int64)
+        edges[name][0::2] = chain
+        edges[name][1::2] = mid_nodes(chain[:-1], chain[1:])
+
+    return {
+        'nodes': np.concatenate([nodes, nodes[ends].mean(axis=1)]),
+        'elems': np.hstack([elems, len(nodes) + inverse.reshape(elems.shape)]),
+        'edges': edges,
+    }
+
+
+def layer_radii(radius_min, radius_max, layers_count, grading=1, spacing=None):
+    """ Радиусы layers_count+1 слоев сетки.
+        grading - отношение толщины внешнего слоя к толщине внутреннего, толщины соседних слоев
+        отличаются в одно и то же число раз (больше 1 - слои сгущаются к radius_min).
+        spacing - функция, переводящая равномерную долю s из [0, 1] в долю толщины кольца
+        (монотонная, spacing(0) = 0, spacing(1) = 1); если задана, grading не используется """
+    layers = np.arange(layers_count+1)
+
+    if spacing is not None:
+        t = np.asarray(spacing(layers/layers_count), dtype=float)
+    elif grading != 1 and layers_count > 1:
+        ratio = grading**(1/(layers_count-1))
+        t = (ratio**layers - 1)/(ratio**layers_count - 1)
+    else:
+        # равномерные слои с шагом delta - типичным размером элемента сетки
+        delta = (radius_max-radius_min)/layers_count
+        return radius_min + delta*layers
+
+    return radius_min + (radius_max-radius_min)*t
+
+
+def GenLameMesh(config_geometry, config_mesh, spacing=None):
+    """ Сетка четверти кольца. config_mesh: resolution - число элементов вдоль внутренней дуги,
+        order - 1 (TRI3, по умолчанию) или 2 (TRI6 с узлами на серединах ребер),
+        grading - отношение толщин внешнего и внутреннего слоя (по умолчанию 1 - равномерные слои).
+        spacing - функция распределения слоев по радиусу (см. layer_radii), задается вне конфига """
 
     # разрешение (мелкость) сетки #
     resolution = config_mesh['resolution']
@@ -19,62 +74,62 @@ def GenLameMesh(config_geometry, config_mesh):
     radius_min, radius_max = config_geometry['radius_min'], config_geometry['radius_max']
 
 
-    nodes = []
-    elems = []
+    # число слоев сетки вдоль радиуса
+    mesh_layers_count = int(2*resolution/pi*(radius_max-radius_min)/radius_min) + 1 
 
-    edges = {
-        'inner': [],
-        'right': [],
-        'outer': [],
-        'left': []
-    }
+    # радиусы слоев: равномерно с шагом (radius_max-radius_min)/mesh_layers_count или со сгущением к radius_min
+    radii = layer_radii(radius_min, radius_max, mesh_layers_count, config_mesh.get('grading', 1), spacing)
 
+    layers = np.arange(mesh_layers_count+1)
 
-    # число слоев сетки вдоль радиуса
-    mesh_layers_count = int(2*resolution/pi*(radius_max-radius_min)/radius_min) + 1 
+    # в слое r лежит resolution+r+1 узлов, layer_start[r] - номер первого из них
+    layer_size = resolution+layers+1
+    layer_start = (2*resolution+layers+1)*layers//2
 
-    # типичный размер элемента сетки / расстояние между слоями
-    delta = (radius_max-radius_min)/mesh_layers_count
+    #генерируем узлы сетки слой за слоем, в каждом слое - по возрастанию угла
 
-    #генерируем узлы сетки и добавляем их на края
+    r = np.repeat(layers, layer_size)
+    f = np.arange(layer_size.sum()) - layer_start[r]
 
-    node_index = 0
-    for r in range(mesh_layers_count+1):
-        for f in range(resolution+r+1):
-            coord = polar2сartesian(radius_min+delta*r, float(f)/(resolution+r))
-            nodes.append(coord)
+    nodes = polar2сartesian(radii[r], f/(resolution+r))
 
-            if r==0:
-                edges['inner'].append(node_index)
-            if f==0:
-                edges['right'].append(node_index)
-            if r==mesh_layers_count:
-                edges['outer'].append(node_index)
-            if f==(resolution+r):
-                edges['left'].append(node_index)
+    #края сетки
 
-            node_index += 1
+    edges = {
+        'inner': np.arange(resolution+1)[::-1],
+        'right': layer_start,
+        'outer': layer_start[-1] + np.arange(layer_size[-1]),
+        'left': layer_start + layer_size - 1,
+    }
 
-    edges['inner'].reverse()
+    #генерируем треугольные элементы сетки: на каждую пару (r, f) приходится
+    #треугольник [a,b,c2] к предыдущему слою и треугольник [a,c1,b] к следующему
 
+    r = np.repeat(layers, resolution+layers)
+    f = np.arange(len(r)) - (layer_start[r] - r)
 
-    #генерируем треугольные элементы сетки
+    a = layer_start[r] + f
+    b = a + 1
+    c1 = layer_start[np.minimum(r+1, mesh_layers_count)] + f + 1
+    c2 = layer_start[np.maximum(r-1, 0)] + f
 
-    for r in range(mesh_layers_count+1):
-        for f in range(resolution+r):
-            a = (2*resolution+r+1)*r//2 + f
-            b = (2*resolution+r+1)*r//2 + f + 1
-            c1 = (2*resolution+r+2)*(r+1)//2 + f + 1
-            c2 = (2*resolution+r)*(r-1)//2 + f
-            if r != 0:
-                elems.append([a,b,c2])
-            if r != mesh_layers_count:
-                elems.append([a,c1,b])
+    elems = np.stack([
+        np.stack([a, b, c2], axis=1),
+        np.stack([a, c1, b], axis=1),
+    ], axis=1)
 
+    exists = np.stack([r != 0, r != mesh_layers_count], axis=1)
 
-    return {
-        'nodes': np.array(nodes),
-        'elems': np.array(elems),
+    elems = elems[exists]
+
+    mesh = {
+        'nodes': nodes,
+        'elems': elems,
         'edges': edges,
     }
 
+    if config_mesh.get('order', 1) == 2:
+        return quadratic_mesh(mesh)
+
+    return mesh
+
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+# квадратуры Гаусса на треугольнике по степени точности: точки в барицентрических координатах (q, 3)
+# и веса (q,), нормированные на единичную сумму (интеграл = площадь * сумма весов * значения)
+_a, _b = 0.445948490915965, 0.091576213509771
+
+TRIANGLE_QUADRATURE = {
+    1: (np.array([[1/3, 1/3, 1/3]]), np.array([1.0])),
+    2: (np.array([[2/3, 1/6, 1/6], [1/6, 2/3, 1/6], [1/6, 1/6, 2/3]]), np.full(3, 1/3)),
+    4: (
+        np.array([
+            [1-2*_a, _a, _a], [_a, 1-2*_a, _a], [_a, _a, 1-2*_a],
+            [1-2*_b, _b, _b], [_b, 1-2*_b, _b], [_b, _b, 1-2*_b],
+        ]),
+        np.array([0.223381589678011]*3 + [0.109951743655322]*3),
+    ),
+}
+
+# трехточечная квадратура Гаусса на отрезке [0, 1], веса нормированы на единичную сумму
+LINE_QUADRATURE = (np.array([0.5-0.15**0.5, 0.5, 0.5+0.15**0.5]), np.array([5/18, 8/18, 5/18]))
+
+# вершины треугольника (и середины его ребер для TRI6) в барицентрических координатах
+TRIANGLE_NODES = {
+    3: np.eye(3),
+    6: np.array([
+        [1, 0, 0], [0, 1, 0], [0, 0, 1],
+        [1/2, 1/2, 0], [0, 1/2, 1/2], [1/2, 0, 1/2],
+    ]),
+}
+
+
+def triangle_shapes(L, k):
+    """ Функции формы треугольника из k узлов (3 - TRI3, 6 - TRI6) в точках с барицентрическими координатами L (..., 3).
+        Узлы TRI6 упорядочены как в ELEMENT_TYPES: вершины, затем середины ребер 0-1, 1-2, 2-0. Результат (..., k) """
+    if k == 3:
+        return L
+
+    L0, L1, L2 = L[...,0], L[...,1], L[...,2]
+
+    return np.stack([
+        L0*(2*L0-1), L1*(2*L1-1), L2*(2*L2-1),
+        4*L0*L1, 4*L1*L2, 4*L2*L0,
+    ], axis=-1)
+
+
+def triangle_derivatives(L, k):
+    """ Производные функций формы по локальным координатам xi = L1, eta = L2 (L0 = 1 - xi - eta).
+        L (..., 3), результат (..., 2, k) """
+    if k == 3:
+        dN = np.array([[-1, 1, 0], [-1, 0, 1]], dtype=float)
+        return np.broadcast_to(dN, L.shape[:-1]+(2, 3))
+
+    L0, L1, L2 = L[...,0], L[...,1], L[...,2]
+    zero = np.zeros_like(L0)
+
+    # производные по L0, L1, L2 каждой из функций формы
+    dL0 = np.stack([4*L0-1, zero, zero, 4*L1, zero, 4*L2], axis=-1)
+    dL1 = np.stack([zero, 4*L1-1, zero, 4*L0, 4*L2, zero], axis=-1)
+    dL2 = np.stack([zero, zero, 4*L2-1, zero, 4*L1, 4*L0], axis=-1)
+
+    return np.stack([dL1-dL0, dL2-dL0], axis=-2)
+
+
+def line_shapes(t, k):
+    """ Функции формы отрезка из k узлов (2 - концы a, b; 3 - a, b и середина) в точках t из [0, 1]
+        и их производные по t; обе формы (len(t), k) """
+    if k == 2:
+        return np.stack([1-t, t], axis=-1), np.stack([-np.ones_like(t), np.ones_like(t)], axis=-1)
+
+    return (
+        np.stack([(1-t)*(1-2*t), t*(2*t-1), 4*t*(1-t)], axis=-1),
+        np.stack([4*t-3, 4*t-1, 4-8*t], axis=-1),
+    )
@@ -1,6 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from scipy import sparse
-from scipy.sparse.linalg import spsolve
+
+from linear_solvers import LinearSolver
+from shape_functions import LINE_QUADRATURE, TRIANGLE_NODES, TRIANGLE_QUADRATURE, line_shapes, triangle_derivatives, triangle_shapes
+from spatial_index import ElementGrid, barycentric
 
 
 def D_matrix(E, Nu):
@@ -45,106 +50,467 @@ def Area(a,b,c):
     return (a[0]*b[1]+b[0]*c[1]+c[0]*a[1]-a[1]*b[0]-b[1]*c[0]-c[1]*a[0])/2
 
 
-def solver(task):
-    N = 2*len(task['nodes'])
+def Areas(abc):
+    """ Площади сразу всех треугольников, abc - массив координат вершин формы (n_elems, 3, 2) """
+    a, b, c = abc[:,0], abc[:,1], abc[:,2]
+    return (a[:,0]*b[:,1]+b[:,0]*c[:,1]+c[:,0]*a[:,1]-a[:,1]*b[:,0]-b[:,1]*c[:,0]-c[:,1]*a[:,0])/2
 
-    K_global = sparse.lil_matrix((N,N))
-    F_global = np.zeros((N, 1))
 
-    Nu = task['material']['Nu']
-    E = task['material']['E']
+def B_matrices(abc):
+    """ Матрицы B сразу всех элементов, форма результата (n_elems, 3, 6) """
+    a, b, c = abc[:,0], abc[:,1], abc[:,2]
 
-    # мы не используем Е, потому что домножение K_global на большое число отвратительно влияет на точность решения, 
-    # а E является линейным коэффициентом задачи. Так что мы просто поделим на него в конце вектор перемещений узлов.
-    D = D_matrix(1, Nu) 
+    B = np.zeros((len(abc), 3, 6))
 
-    for el in task['elems']:
-        
-        abc = task['nodes'][el]
+    B[:,0,0::2] = np.stack([b[:,1]-c[:,1], c[:,1]-a[:,1], a[:,1]-b[:,1]], axis=1)
+    B[:,1,1::2] = np.stack([c[:,0]-b[:,0], a[:,0]-c[:,0], b[:,0]-a[:,0]], axis=1)
+    B[:,2,0::2] = B[:,1,1::2]
+    B[:,2,1::2] = B[:,0,0::2]
 
-        B = B_matrix(*abc)
+    return B/(2*Areas(abc))[:,None,None]
 
-        K_local = B.transpose().dot(D).dot(B)*Area(*abc)*2
 
-        for i in range(6):
-            for j in range(6):
-                K_global[2*el[i//2]+i%2, 2*el[j//2]+j%2] += K_local[i, j]
+def jacobians(xy, L):
+    """ Производные функций формы по локальным координатам (n, q, 2, k) и матрицы Якоби (n, q, 2, 2) элементов
+        с узлами xy (n, k, 2) в точках с барицентрическими координатами L: общими для всех элементов (q, 3)
+        или своими для каждого (n, q, 3) """
+    n, k = xy.shape[:2]
+    L = np.broadcast_to(L, (n,)+np.shape(L)[-2:])
 
+    dN = triangle_derivatives(L, k)
+    J = np.einsum('nqak,nkb->nqab', dN, xy)
 
-    for bound in task['bcs']:
-        if bound['type'] == "neumann":
-            
-            j = bound['nodes'][0]
-            for i in bound['nodes'][1:]:
-                a = task['nodes'][j]
-                b = task['nodes'][i]
+    return dN, J
+
+
+def B_matrices_at(xy, L):
+    """ Матрицы B (n, q, 3, 2k) и определители матриц Якоби (n, q) в точках L (см. jacobians).
+        Для TRI3 определитель равен удвоенной площади, а B совпадает с B_matrices """
+    dN, J = jacobians(xy, L)
+
+    # производные функций формы по x, y
+    dN = np.linalg.solve(J, dN)
+
+    B = np.zeros(dN.shape[:2]+(3, 2*xy.shape[1]))
+
+    B[...,0,0::2] = dN[...,0,:]
+    B[...,1,1::2] = dN[...,1,:]
+    B[...,2,0::2] = dN[...,1,:]
+    B[...,2,1::2] = dN[...,0,:]
+
+    return B, np.linalg.det(J)
+
+
+def element_dofs(elems):
+    """ Номера степеней свободы узлов каждого элемента в порядке (x_a, y_a, x_b, y_b, ...) """
+    dofs = np.empty((len(elems), 2*elems.shape[1]), dtype=np.int64)
+    dofs[:,0::2] = 2*elems
+    dofs[:,1::2] = 2*elems+1
+    return dofs
+
+
+def assemble_chunk(abc, elems, D):
+    """ Часть глобальной матрицы жесткости от группы элементов: K_local считаются батчем (n_elems, 2k, 2k)
+        и возвращаются COO-триплетами (строки, столбцы, значения) - плоскими массивами длины n_elems*(2k)^2.
+        abc - координаты узлов элементов (n_elems, k, 2): TRI3 (k=3) или TRI6 (k=6) """
+    if abc.shape[1] == 3:
+        B = B_matrices(abc)
+
+        K_local = np.einsum('eki,kl,elj->eij', B, D, B)*(Areas(abc)*2)[:,None,None]
+    else:
+        # для TRI6 B линейна внутри элемента и B^T D B интегрируется точно квадратурой второй степени;
+        # как и для TRI3, берется удвоенный интеграл (веса в сумме дают 1, а определитель - 2*Area)
+        points, weights = TRIANGLE_QUADRATURE[2]
+        B, det = B_matrices_at(abc, points)
+
+        K_local = np.einsum('eqki,kl,eqlj,eq->eij', B, D, B, det*weights, optimize=True)
+
+    dofs = element_dofs(elems)
+    rows = np.repeat(dofs, dofs.shape[1], axis=1)
+    cols = np.tile(dofs, (1, dofs.shape[1]))
+
+    return rows.ravel(), cols.ravel(), K_local.ravel()
+
+
+def _assemble_chunk(args):
+    return assemble_chunk(*args)
+
+
+def assemble_stiffness(nodes, elems, D, workers=1, chunk_size=None):
+    """ Сборка глобальной матрицы жесткости.
+        Элементы делятся на группы по chunk_size (по умолчанию - поровну на каждый процесс), группы считаются
+        в пуле из workers процессов, а их COO-триплеты объединяются и переводятся в CSR один раз.
+        При workers=1 и без chunk_size все элементы собираются одним батчем в текущем процессе.
+        Пул процессов при методах запуска spawn/forkserver (macOS, Windows) требует, чтобы вызывающий
+        скрипт был защищен условием if __name__ == '__main__' """
+    N = 2*len(nodes)
 
-                d = np.array([a[1]-b[1], b[0]-a[0]])*bound['value']
+    if workers == 1 and chunk_size is None:
+        fragments = [assemble_chunk(nodes[elems], elems, D)]
+    else:
+        if chunk_size is None:
+            chunk_size = -(-len(elems) // workers)
 
-                F_global[(2*i, 2*i+1),0] += d
-                F_global[(2*j, 2*j+1),0] += d
+        chunks = (
+            (nodes[elems[start:start+chunk_size]], elems[start:start+chunk_size], D)
+            for start in range(0, len(elems), chunk_size)
+        )
 
-                j = i
+        if workers == 1:
+            fragments = list(map(_assemble_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                fragments = list(executor.map(_assemble_chunk, chunks))
 
+    rows, cols, values = (np.concatenate(parts) for parts in zip(*fragments))
+
+    # повторяющиеся пары (строка, столбец) суммируются при переводе в CSR
+    return sparse.coo_matrix((values, (rows, cols)), shape=(N,N)).tocsr()
+
+
+def dirichlet_dofs(bcs):
+    """ Номера закрепленных степеней свободы и заданные на них значения по всем гранусловиям первого рода """
+    fixed = []
+    values = []
+
+    for bound in bcs:
         if bound['type'] == "dirichlet":
-            for node in bound['nodes']:
+            nodes = np.asarray(bound['nodes'], dtype=np.int64)
+            fixed.append(2*nodes+bound['fix'])
+            values.append(np.broadcast_to(np.asarray(bound['value'], dtype=float), nodes.shape))
+
+    if not fixed:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    return np.concatenate(fixed), np.concatenate(values)
+
+
+def constrain_matrix(K_global, fixed):
+    """ Занулить строки и столбцы закрепленных степеней свободы диагональной маской и поставить 1 на диагональ.
+        Матрица остается симметричной и положительно определенной. """
+    free = np.ones(K_global.shape[0])
+    free[fixed] = 0
+
+    mask = sparse.diags(free)
+    return (mask @ K_global @ mask + sparse.diags(1-free)).tocsr()
+
+
+def constrain_rhs(K_global, F_global, fixed, values):
+    """ Перенести известные перемещения в правую часть (F -= K u_fixed) и записать их на место закрепленных степеней свободы.
+        K_global - матрица до наложения гранусловий """
+    U_fixed = np.zeros(K_global.shape[0])
+    U_fixed[fixed] = values
+
+    F_global = F_global - K_global.dot(U_fixed).reshape(F_global.shape)
+    F_global[fixed,0] = values
+
+    return F_global
+
+
+def boundary_edges(bound, order=1):
+    """ Отрезки границы: либо явно заданные bound['edges'], либо составленные из цепочки узлов bound['nodes'].
+        order=1 - пары соседних узлов (n_edges, 2); order=2 - ребра TRI6 (n_edges, 3) вида (a, b, середина),
+        цепочка при этом чередует вершины и середины ребер: a, ab, b, bc, c, ... """
+    if 'edges' in bound:
+        return np.asarray(bound['edges']).reshape(-1, order+1)
+
+    chain = np.asarray(bound['nodes'])
+
+    if order == 2:
+        return np.column_stack([chain[:-2:2], chain[2::2], chain[1::2]])
+
+    return np.column_stack([chain[:-1], chain[1:]])
+
+
+def scatter_nodal(n_nodes, ids, forces):
+    """ Сложить силы forces (n, 2) в узлах ids (n,) в вектор (2*n_nodes, 1) с чередованием осей x, y """
+    F = np.stack([
+        np.bincount(ids, weights=forces[:,0], minlength=n_nodes),
+        np.bincount(ids, weights=forces[:,1], minlength=n_nodes),
+    ], axis=1)
+    return F.reshape(-1, 1)
+
 
-                n = 2*node+bound['fix']
-                for i in range(N):
-                    if i != n:
-                        K_global[i,n] = 0
-                        K_global[n,i] = 0
+def edge_loads(nodes, edges, pressure=0, shear=0):
+    """ Узловые силы от нагрузки на отрезках границы edges (n_edges, 2) или ребрах TRI6 (n_edges, 3): давление pressure
+        действует по левой нормали к направлению a -> b, касательная нагрузка shear - вдоль a -> b.
+        pressure и shear - скаляры или значения на каждом отрезке. Нормали и длины всех отрезков считаются за один проход """
+    edges = np.asarray(edges)
+    edges = edges.reshape(-1, 2) if edges.ndim == 1 else edges
+    pressure = np.broadcast_to(np.asarray(pressure, dtype=float), len(edges))
+    shear = np.broadcast_to(np.asarray(shear, dtype=float), len(edges))
 
-                K_global[n,n] = 1
-                F_global[n,0] = bound['value']
+    if edges.shape[1] == 3:
+        # квадратичные ребра: касательная dx/dt меняется вдоль ребра, нагрузка интегрируется квадратурой Гаусса
+        t, weights = LINE_QUADRATURE
+        N, dN = line_shapes(t, 3)
 
-    U = spsolve(K_global, F_global)
+        tangent = np.einsum('qk,ekd->eqd', dN, nodes[edges])
+        normal = np.stack([-tangent[...,1], tangent[...,0]], axis=-1)
 
-    U = U.reshape((N//2, 2))/E
+        traction = normal*pressure[:,None,None] + tangent*shear[:,None,None]
+        forces = 2*np.einsum('q,qk,eqd->ekd', weights, N, traction)
 
-    return Solution(task, U)
+        return scatter_nodal(len(nodes), edges.ravel(), forces.reshape(-1, 2))
+
+    # вектор a -> b и левая нормаль к нему, оба длиной в длину отрезка
+    tangent = nodes[edges[:,1]] - nodes[edges[:,0]]
+    normal = np.column_stack([-tangent[:,1], tangent[:,0]])
+
+    # как и матрица жесткости (2*Area), нагрузка на каждый узел отрезка берется удвоенной: p*L вместо p*L/2
+    forces = normal*pressure[:,None] + tangent*shear[:,None]
+
+    return scatter_nodal(len(nodes), edges.ravel(), np.repeat(forces, 2, axis=0))
+
+
+def body_force(nodes, bound):
+    """ Объемная сила в узлах (n_nodes, 2) для грануслования типа body: density*(gravity + omega^2*(x - center)) -
+        сила тяжести и центробежная сила вращения с угловой скоростью omega вокруг точки center """
+    density = bound.get('density', 1)
+    force = np.zeros((len(nodes), 2))
+    force += np.asarray(bound.get('gravity', (0, 0)), dtype=float)
+
+    if 'omega' in bound:
+        force += bound['omega']**2*(nodes - np.asarray(bound.get('center', (0, 0)), dtype=float))
+
+    return density*force
+
+
+def body_loads(nodes, elems, force):
+    """ Узловые силы от объемной силы force, заданной в узлах (n_nodes, 2) и интерполированной функциями формы элемента.
+        Согласованная нагрузка на вершину i TRI3: Area/12*(f_i + f_a + f_b + f_c), удвоенная, как и матрица жесткости;
+        для TRI6 интеграл считается квадратурой четвертой степени """
+    elems = np.asarray(elems)
+
+    if elems.shape[1] == 6:
+        points, weights = TRIANGLE_QUADRATURE[4]
+        N = triangle_shapes(points, 6)
+        _, J = jacobians(nodes[elems], points)
+
+        f = np.einsum('qk,ekd->eqd', N, force[elems])
+        forces = np.einsum('q,eq,qk,eqd->ekd', weights, np.linalg.det(J), N, f, optimize=True)
+
+        return scatter_nodal(len(nodes), elems.ravel(), forces.reshape(-1, 2))
+    areas = Areas(nodes[elems])
+
+    f = force[elems]
+    forces = (f + f.sum(axis=1, keepdims=True))*(areas/6)[:,None,None]
+
+    return scatter_nodal(len(nodes), elems.ravel(), forces.reshape(-1, 2))
+
+
+def load_vector(nodes, bcs, elems=None):
+    """ Вектор узловых сил от гранусловий второго рода (давления и касательные нагрузки на границе)
+        и объемных сил (body, нужны элементы elems). Для сетки из TRI6 цепочки узлов границы включают середины ребер """
+    F_global = np.zeros((2*len(nodes), 1))
+    order = 2 if elems is not None and np.shape(elems)[1] == 6 else 1
+
+    for bound in bcs:
+        if bound['type'] == "neumann":
+            F_global += edge_loads(nodes, boundary_edges(bound, order), bound.get('value', 0), bound.get('shear', 0))
+
+        if bound['type'] == "body":
+            assert elems is not None, 'body forces need mesh elements'
+            body_elems = np.asarray(elems)[bound['elems']] if 'elems' in bound else elems
+            F_global += body_loads(nodes, body_elems, body_force(nodes, bound))
+
+    return F_global
+
+
+def bcs_topology(bcs):
+    """ Часть гранусловий, от которой зависит матрица системы: типы, закрепляемые оси и узлы, но не значения """
+    return [
+        (bound['type'], bound.get('fix'), np.asarray(bound.get('nodes', bound.get('edges', bound.get('elems', [])))).tobytes())
+        for bound in bcs
+    ]
+
+
+class LinearSystem:
+    """ Собранная и подготовленная к решению (факторизованная) система для заданной сетки, Nu и топологии гранусловий.
+        Давления и заданные перемещения меняют только правую часть, а E - только масштаб ответа,
+        поэтому серия нагружений на одной сетке стоит одной факторизации и по одному обратному ходу на случай. """
+
+    def __init__(self, task):
+        self.nodes = task['nodes']
+        self.elems = np.asarray(task['elems'])
+        self.N = 2*len(self.nodes)
+
+        self.Nu = task['material']['Nu']
+        self.topology = bcs_topology(task['bcs'])
+
+        # мы не используем Е, потому что домножение K_global на большое число отвратительно влияет на точность решения, 
+        # а E является линейным коэффициентом задачи. Так что мы просто поделим на него в конце вектор перемещений узлов.
+        # параметры сборки и метод решения СЛАУ задаются в task['solver'], по умолчанию - сборка в одном процессе и прямой LU
+        options = dict(task.get('solver', {}))
+        workers = options.pop('workers', 1)
+        chunk_size = options.pop('chunk_size', None)
+
+        self.K_global = assemble_stiffness(self.nodes, self.elems, D_matrix(1, self.Nu), workers, chunk_size)
+
+        fixed, _ = dirichlet_dofs(task['bcs'])
+
+        self.linear_solver = LinearSolver(constrain_matrix(self.K_global, fixed), **options)
+
+    def rhs(self, task):
+        """ Правая часть системы для задачи task с той же сеткой, Nu и топологией гранусловий """
+        assert task['material']['Nu'] == self.Nu, 'task Nu differs from the assembled system'
+        assert bcs_topology(task['bcs']) == self.topology, 'task bcs topology differs from the assembled system'
+
+        F_global = load_vector(self.nodes, task['bcs'], self.elems)
+
+        # система решается при E=1, поэтому заданные перемещения домножаем на E
+        fixed, values = dirichlet_dofs(task['bcs'])
+        return constrain_rhs(self.K_global, F_global, fixed, values*task['material']['E'])
+
+    def solve(self, task):
+        """ Решить одну задачу """
+        U = self.linear_solver.solve(self.rhs(task))
+
+        return Solution(task, U.reshape((self.N//2, 2))/task['material']['E'], dict(self.linear_solver.info))
+
+    def solve_many(self, tasks):
+        """ Решить серию задач одним блоком правых частей, возвращает список Solution """
+        U = self.linear_solver.solve(np.hstack([self.rhs(task) for task in tasks]))
+        U = U.reshape((self.N, len(tasks)))
+
+        return [
+            Solution(task, U[:,k].reshape((self.N//2, 2))/task['material']['E'], dict(self.linear_solver.info))
+            for k, task in enumerate(tasks)
+        ]
+
+
+def solver(task):
+    return LinearSystem(task).solve(task)
 
 
 class Solution:
 
-    def __init__(self, task, node_displacements):
+    def __init__(self, task, node_displacements, solver_info=None):
         self.nodes = task['nodes']
-        self.elems = task['elems']
+        self.elems = np.asarray(task['elems'])
         self.len = len(task['nodes'])
         self.node_displacements = node_displacements
         self.material = task['material']
+        self.solver_info = solver_info
+        self._grid = None
+        self._elem_strain = None
+        self._elem_stress = None
+        self._node_stress = None
+
+    @property
+    def grid(self):
+        """ Пространственный индекс элементов, строится при первом обращении """
+        if self._grid is None:
+            self._grid = ElementGrid(self.nodes, self.elems)
+        return self._grid
+
+    @property
+    def elem_strain(self):
+        """ Деформации по элементам формы (n_elems, 3); для линейных треугольников они постоянны внутри элемента,
+            для TRI6 берется значение в центре элемента """
+        if self._elem_strain is None:
+            if self.elems.shape[1] == 3:
+                abc = self.nodes[self.elems]
+                node_displacement = self.node_displacements[self.elems].reshape(-1, 6)
+                self._elem_strain = np.einsum('eij,ej->ei', B_matrices(abc), node_displacement)
+            else:
+                self._elem_strain = self.strain_at(np.arange(len(self.elems)), TRIANGLE_QUADRATURE[1][0])[:,0]
+        return self._elem_strain
+
+    @property
+    def elem_stress(self):
+        """ Напряжения по элементам формы (n_elems, 3) """
+        if self._elem_stress is None:
+            D = D_matrix(self.material['E'], self.material['Nu'])
+            self._elem_stress = self.elem_strain.dot(D.transpose())
+        return self._elem_stress
+
+    @property
+    def node_stress(self):
+        """ Восстановленные в узлах напряжения формы (n_nodes, 3): среднее по смежным элементам с весом их площади.
+            Для TRI6 осредняются значения, вычисленные в узлах каждого элемента """
+        if self._node_stress is None:
+            if self.elems.shape[1] == 3:
+                self._node_stress = self.nodal_average(self.elem_stress)
+            else:
+                D = D_matrix(self.material['E'], self.material['Nu'])
+                strain = self.strain_at(np.arange(len(self.elems)), TRIANGLE_NODES[6])
+                self._node_stress = self.nodal_average(strain.dot(D.transpose()))
+        return self._node_stress
+
+    def strain_at(self, elem_ids, L):
+        """ Деформации (n, q, 3) в элементах elem_ids (n,) в точках с барицентрическими координатами L:
+            общими для всех элементов (q, 3) или своими для каждого (n, q, 3) """
+        elems = self.elems[elem_ids]
+        B, _ = B_matrices_at(self.nodes[elems], L)
+        node_displacement = self.node_displacements[elems].reshape(len(elems), -1)
+        return np.einsum('eqij,ej->eqi', B, node_displacement)
+
+    def nodal_average(self, elem_values):
+        """ Осреднить поле в узлы с весом площади элементов. elem_values - значения по элементам (n_elems, 3)
+            или в узлах каждого элемента (n_elems, k, 3) """
+        k = self.elems.shape[1]
+        weights = np.repeat(Areas(self.nodes[self.elems]), k)
+        index = self.elems.ravel()
+
+        if elem_values.ndim == 2:
+            elem_values = np.repeat(elem_values, k, axis=0)
+        else:
+            elem_values = elem_values.reshape(-1, elem_values.shape[-1])
+
+        total = np.bincount(index, weights=weights, minlength=self.len)
+
+        return np.stack([
+            np.bincount(index, weights=weights*column, minlength=self.len)
+            for column in elem_values.transpose()
+        ], axis=1)/total[:,None]
 
     def __call__(self,x,y):
         """Вычислить значение полей напряжения/перемещения/деформации в заданой точке решения"""
 
-        for elem in self.elems:
+        fields = self.evaluate([[x, y]])
+
+        return {
+            "displacement":fields["displacement"].reshape((2, 1)),
+            "stress":fields["stress"].reshape((3, 1)),
+            "strain":fields["strain"].reshape((3, 1))
+        }
 
-            #координаты узлов элемента
-            abc = self.nodes[elem]
+    def evaluate(self, points):
+        """Вычислить поля сразу в массиве точек формы (M, 2).
+        Возвращает displacement формы (M, 2), strain и stress формы (M, 3); вне области поля нулевые.
+        Для TRI6 перемещения квадратичны, а деформации и напряжения линейны внутри элемента"""
 
-            Nu = self.material['Nu']
-            E = self.material['E']
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
 
-            Shape = N_matrix(*abc)(x,y)
+        located = self.grid.locate(points)
+        inside = located >= 0
 
-            if Shape[0,0] >= 0 and Shape[0,2] >= 0 and Shape[0,4] >= 0: # если точка внутри элемента
+        elems = self.elems[located[inside]]
 
-                node_displacement = self.node_displacements[elem].reshape((6, 1)) # вектор перемещений узлов элемента
+        #координаты вершин и перемещения узлов найденных элементов
+        abc = self.nodes[elems[:,:3]]
+        node_displacement = self.node_displacements[elems]
 
-                displacement = Shape.dot(node_displacement)
+        # ребра TRI6 прямые, поэтому локальные координаты точки - ее барицентрические координаты в треугольнике вершин
+        L = barycentric(abc, points[inside])
+        Shape = triangle_shapes(L, elems.shape[1])
 
-                strain = B_matrix(*abc).dot(node_displacement)
+        displacement = np.zeros((len(points), 2))
+        displacement[inside] = np.einsum('ek,ekd->ed', Shape, node_displacement)
 
-                stress = D_matrix(E, Nu).dot(strain)
+        strain = np.zeros((len(points), 3))
+        stress = np.zeros((len(points), 3))
 
-                return {
-                    "displacement":displacement,
-                    "stress":stress,
-                    "strain":strain
-                }
+        if self.elems.shape[1] == 3:
+            strain[inside] = self.elem_strain[located[inside]]
+            stress[inside] = self.elem_stress[located[inside]]
+        else:
+            strain[inside] = self.strain_at(located[inside], L[:,None,:])[:,0]
+            stress[inside] = strain[inside].dot(D_matrix(self.material['E'], self.material['Nu']).transpose())
 
         return {
-            "displacement":np.zeros((2,1)),
-            "stress":np.zeros((3,1)),
-            "strain":np.zeros((3,1))
-        }
\ No newline at end of file
+            "displacement":displacement,
+            "stress":stress,
+            "strain":strain
+        }
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+def barycentric(abc, points):
+    """ Барицентрические координаты (значения функций формы N_a, N_b, N_c) точек points
+        относительно треугольников abc; abc формы (n, 3, 2), points формы (n, 2), результат (n, 3) """
+    a, b, c = abc[:,0], abc[:,1], abc[:,2]
+    x, y = points[:,0], points[:,1]
+
+    area2 = a[:,0]*b[:,1]+b[:,0]*c[:,1]+c[:,0]*a[:,1]-a[:,1]*b[:,0]-b[:,1]*c[:,0]-c[:,1]*a[:,0]
+
+    N_a = ((b[:,1]-c[:,1])*x + (c[:,0]-b[:,0])*y + (b[:,0]*c[:,1]-b[:,1]*c[:,0]))/area2
+    N_b = ((c[:,1]-a[:,1])*x + (a[:,0]-c[:,0])*y + (c[:,0]*a[:,1]-c[:,1]*a[:,0]))/area2
+    N_c = ((a[:,1]-b[:,1])*x + (b[:,0]-a[:,0])*y + (a[:,0]*b[:,1]-a[:,1]*b[:,0]))/area2
+
+    return np.stack([N_a, N_b, N_c], axis=1)
+
+
+class ElementGrid:
+    """ Равномерная сетка корзин над треугольными элементами для быстрого поиска элемента по точке.
+        Каждый элемент регистрируется во всех ячейках, которые пересекает его ограничивающий прямоугольник;
+        ячейка хранит список элементов в CSR виде (cell_offsets, cell_elems). """
+
+    def __init__(self, nodes, elems, cell_size=None):
+        self.abc = nodes[elems][:,:3]
+
+        lo = self.abc.min(axis=1)
+        hi = self.abc.max(axis=1)
+
+        self.origin = lo.min(axis=0)
+        self.extent = hi.max(axis=0) - self.origin
+
+        if cell_size is None:
+            # характерный размер элемента
+            cell_size = (hi-lo).max(axis=1).mean()
+
+        self.cell_size = cell_size
+        self.shape = np.maximum(np.ceil(self.extent/cell_size), 1).astype(np.int64)
+
+        i0 = self._cell_coords(lo)
+        i1 = self._cell_coords(hi)
+
+        span = i1-i0+1
+        counts = span[:,0]*span[:,1]
+
+        elem_ids = np.repeat(np.arange(len(self.abc)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+
+        ix = i0[elem_ids,0] + local % span[elem_ids,0]
+        iy = i0[elem_ids,1] + local // span[elem_ids,0]
+        cells = ix*self.shape[1] + iy
+
+        # устойчивая сортировка сохраняет порядок элементов внутри ячейки
+        order = np.argsort(cells, kind='stable')
+
+        self.cell_elems = elem_ids[order]
+        self.cell_offsets = np.zeros(self.shape.prod()+1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.shape.prod()), out=self.cell_offsets[1:])
+
+
+    def _cell_coords(self, points):
+        coords = np.floor((points-self.origin)/self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.shape-1)
+
+
+    def cells(self, points):
+        """ Номера ячеек, в которые попадают точки; -1 для точек вне сетки """
+        relative = points-self.origin
+        inside = ((relative >= 0) & (relative <= self.extent)).all(axis=1)
+
+        coords = self._cell_coords(points)
+
+        return np.where(inside, coords[:,0]*self.shape[1] + coords[:,1], -1)
+
+
+    def locate(self, points):
+        """ Номера элементов, содержащих точки points формы (M, 2); -1 если точка вне области.
+            Если точка лежит на общей границе нескольких элементов, берется элемент с меньшим номером. """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        cells = self.cells(points)
+        inside = cells >= 0
+
+        starts = np.where(inside, self.cell_offsets[cells], 0)
+        counts = np.where(inside, self.cell_offsets[cells+1], 0) - starts
+
+        point_ids = np.repeat(np.arange(len(points)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+
+        candidates = self.cell_elems[starts[point_ids] + local]
+
+        N = barycentric(self.abc[candidates], points[point_ids])
+        hit = (N >= 0).all(axis=1)
+
+        # point_ids отсортированы, поэтому unique дает первого подходящего кандидата для каждой точки
+        hit_points, first = np.unique(point_ids[hit], return_index=True)
+
+        result = np.full(len(points), -1, dtype=np.int64)
+        result[hit_points] = candidates[hit][first]
+
+        return result
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from mesh_generator import GenLameMesh
+from solver import Solution
+
+
+MANIFEST = 'manifest.json'
+
+# версия формата и расчетного кода, входит в хэш конфига: ее увеличение делает недействительными
+# все сохраненные в кэше сетки и решения. Увеличивать при любом изменении, меняющем сетку, решение или формат хранения
+CACHE_VERSION = 1
+
+
+def config_hash(*sections):
+    """ Устойчивый хэш секций конфига: не зависит от порядка ключей и от запуска программы,
+        но меняется вместе с CACHE_VERSION """
+    text = json.dumps([CACHE_VERSION, sections], sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'{type(value)} is not JSON serializable')
+
+
+def _split(obj, arrays, prefix):
+    """ Заменить массивы во вложенной структуре dict/list ссылками на файлы, массивы сложить в arrays """
+    if isinstance(obj, np.ndarray):
+        name = prefix or 'array'
+        arrays[name] = obj
+        return {'__array__': name}
+    if isinstance(obj, dict):
+        return {key: _split(value, arrays, f'{prefix}.{key}' if prefix else key) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_split(value, arrays, f'{prefix}.{i}' if prefix else str(i)) for i, value in enumerate(obj)]
+    return obj
+
+
+def _join(obj, path, mmap_mode):
+    """ Обратная к _split операция: подставить массивы из файлов на место ссылок """
+    if isinstance(obj, dict):
+        if '__array__' in obj:
+            return np.load(os.path.join(path, obj['__array__']+'.npy'), mmap_mode=mmap_mode)
+        return {key: _join(value, path, mmap_mode) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_join(value, path, mmap_mode) for value in obj]
+    return obj
+
+
+def save(path, data):
+    """ Сохранить вложенную структуру dict/list с массивами в каталог path:
+        каждый массив - отдельный несжатый .npy файл, остальное - manifest.json.
+        Каталог сначала пишется во временный и затем переименовывается, так что читатель не увидит его недописанным """
+    arrays = {}
+    manifest = _split(data, arrays, '')
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name+'.npy'), np.ascontiguousarray(array))
+
+    with open(os.path.join(tmp, MANIFEST), 'w') as write_file:
+        json.dump(manifest, write_file, default=_json_default)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # тот же каталог успел записать другой процесс
+        shutil.rmtree(tmp)
+
+
+def load(path, mmap_mode='r'):
+    """ Загрузить структуру, сохраненную save. По умолчанию массивы отображаются в память (mmap_mode='r'):
+        открытие мгновенное, а страницы файла разделяются между процессами через страничный кэш """
+    with open(os.path.join(path, MANIFEST), 'r') as read_file:
+        manifest = json.load(read_file)
+
+    return _join(manifest, path, mmap_mode)
+
+
+def save_mesh(path, mesh):
+    save(path, {'kind': 'mesh', **mesh})
+
+
+def load_mesh(path, mmap_mode='r'):
+    data = load(path, mmap_mode)
+    assert data.pop('kind') == 'mesh', f'{path} is not a mesh'
+    return data
+
+
+def save_task(path, task):
+    save(path, {'kind': 'task', **task})
+
+
+def load_task(path, mmap_mode='r'):
+    data = load(path, mmap_mode)
+    assert data.pop('kind') == 'task', f'{path} is not a task'
+    return data
+
+
+def save_solution(path, solution):
+    """ Сохранить решение: сетку, материал и перемещения узлов (поля в точках восстанавливаются из них) """
+    save(path, {
+        'kind': 'solution',
+        'nodes': solution.nodes,
+        'elems': solution.elems,
+        'material': solution.material,
+        'node_displacements': solution.node_displacements,
+        'solver_info': solution.solver_info,
+    })
+
+
+def load_solution(path, mmap_mode='r'):
+    data = load(path, mmap_mode)
+    assert data['kind'] == 'solution', f'{path} is not a solution'
+    return Solution(data, data['node_displacements'], data['solver_info'])
+
+
+def CachedLameMesh(config_geometry, config_mesh, directory='cache'):
+    """ То же, что GenLameMesh, но сетка ищется в directory по хэшу конфига и генерируется только при промахе """
+    path = os.path.join(directory, 'mesh-'+config_hash(config_geometry, config_mesh))
+
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        return load_mesh(path)
+
+    mesh = GenLameMesh(config_geometry, config_mesh)
+    save_mesh(path, mesh)
+
+    return mesh
@@ -1,5 +1,10 @@
+import numpy as np
 
-def GenLameTask(mesh, config_material, config_bcs):
+from element_types import ELEMENT_TYPES
+from solver import Areas
+
+
+def GenLameTask(mesh, config_material, config_bcs, config_solver=None):
 
     task = {
         'nodes': mesh['nodes'],
@@ -29,6 +34,122 @@ def GenLameTask(mesh, config_material, config_bcs):
             },
         ],
         'material': config_material,
+        'solver': config_solver or {},
     }
 
     return task
+
+
+# коды типов нагрузок fc, которые трактуются как давление на грани элементов
+FC_PRESSURE_LOAD_TYPES = [3]
+
+
+def _lookup(keys, size=None):
+    """ Массив перевода значений keys в их порядковые номера; отсутствующим значениям соответствует -1 """
+    lookup = np.full((keys.max()+1 if size is None else size), -1, dtype=np.int64)
+    lookup[keys] = np.arange(len(keys))
+    return lookup
+
+
+def GenFCTask(fc, config_solver=None):
+    """ Задача для solver из fc модели (FCReader): TRI3 элементы, узлы в плоскости xy,
+        закрепления (restraints) - гранусловия первого рода, давления (loads) на гранях элементов - второго рода,
+        материал - по блоку элементов. Все перенумерации id -> индекс делаются через массивы перевода """
+
+    mesh_elems = fc.mesh['elems']
+    mesh_nodes = fc.mesh['nodes']
+
+    tri3 = next(t for t in ELEMENT_TYPES if t['type'] == 'TRI3')
+
+    # TRI3 элементы в порядке файла
+    tri_types = [mesh_elems['by_type'][c] for c in tri3['fc_id'] if c in mesh_elems['by_type']]
+    assert tri_types, 'fc model has no TRI3 elements'
+
+    index = np.concatenate([t['index'] for t in tri_types])
+    order = np.argsort(index)
+    index = index[order]
+    elem_node_ids = np.concatenate([t['nodes'] for t in tri_types])[order]
+
+    # в задачу попадают только узлы TRI3 элементов, иначе матрица жесткости будет вырожденной
+    used_ids = np.unique(elem_node_ids)
+    node_index = _lookup(used_ids, max(used_ids.max(), mesh_nodes['id'].max())+1)
+
+    nodes = mesh_nodes['xyz'][_lookup(mesh_nodes['id'])[used_ids], :2]
+    elems = node_index[elem_node_ids]
+
+    # элементы обходятся против часовой стрелки; для остальных запоминаем, что ребра надо развернуть
+    clockwise = Areas(nodes[elems]) < 0
+    elems[clockwise] = elems[clockwise][:,[0,2,1]]
+
+    bcs = []
+
+    for restraint in fc.restraints:
+        if isinstance(restraint['apply_to'], str):  # 'all'
+            restraint_nodes = np.arange(len(nodes))
+            inside = slice(None)
+        else:
+            restraint_nodes = node_index[restraint['apply_to']]
+            inside = restraint_nodes >= 0
+            restraint_nodes = restraint_nodes[inside]
+
+        flags = restraint.get('flag', [True]*len(restraint['data']))
+
+        for fix in range(2):
+            if flags[fix]:
+                value = restraint['data'][fix]
+                bcs.append({
+                    'nodes': restraint_nodes,
+                    'type': 'dirichlet',
+                    'fix': fix,
+                    'value': value[0] if len(value) == 1 else value[inside],
+                })
+
+    # id элемента -> номер среди TRI3 элементов
+    tri_index = _lookup(index, len(mesh_elems['id'])+1)[_lookup(mesh_elems['id'])]
+    edge_structure = tri3['structure'][1].reshape(-1, 2)
+
+    for load in fc.loads:
+        if load.get('type') not in FC_PRESSURE_LOAD_TYPES or isinstance(load['apply_to'], str):
+            continue
+
+        elem_ids, faces = load['apply_to'][:,0], load['apply_to'][:,1]
+        load_elems = tri_index[elem_ids]
+
+        # нагрузки на элементы других типов (ребра, балки) в плоскую задачу не попадают
+        inside = load_elems >= 0
+        load_elems, faces = load_elems[inside], faces[inside]
+
+        if not len(load_elems):
+            continue
+
+        assert (faces < len(edge_structure)).all(), 'TRI3 face index out of range'
+
+        edges = elem_node_ids[load_elems[:,None], edge_structure[faces]]
+        edges = node_index[edges]
+
+        # у развернутых элементов ребро тоже разворачиваем, чтобы элемент оставался слева от него
+        flip = clockwise[load_elems]
+        edges[flip] = edges[flip][:,::-1]
+
+        value = load['data'][0]
+        bcs.append({
+            'edges': edges,
+            'type': 'neumann',
+            'value': value[0] if len(value) == 1 else value[inside],
+        })
+
+    # материал берется из блока TRI3 элементов
+    blocks = np.unique(mesh_elems['block'][index])
+    assert len(blocks) == 1, 'TRI3 elements must belong to one block'
+
+    block = next(b for b in fc.blocks if b['id'] == blocks[0])
+    material = next(m for m in fc.materials if m['id'] == block['material_id'])
+    E, Nu = material['elasticity'][0]['constants'][:2]
+
+    return {
+        'nodes': nodes,
+        'elems': elems,
+        'bcs': bcs,
+        'material': {'E': float(E[0]), 'Nu': float(Nu[0])},
+        'solver': config_solver or {},
+    }
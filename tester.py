@@ -1,58 +1,113 @@
 import time
-from math import sqrt
+from math import pi
+
+import numpy as np
+
 now = time.time()
 
-def LameTest(solution, config):
+# поля решения и подписи их компонент в отчете LameTest
+FIELDS = {
+    'displacement': ['x', 'y'],
+    'strain': ['xx', 'yy', 'xy'],
+    'stress': ['xx', 'yy', 'xy'],
+}
+
+
+def LameTest(solution, config, samples=10000, seed=0):
+    """ Сравнение решения с аналитическим в samples случайных точках, равномерно распределенных по площади
+        четверти кольца. Для каждой компоненты перемещений, деформаций и напряжений печатается погрешность
+        в нормах L-inf (максимум модуля) и L2, отнесенная к той же норме всего поля, для решения в целом -
+        относительная погрешность в энергетической норме.
+        Точки, не попавшие в сетку (между дугой и аппроксимирующими ее хордами), отбрасываются.
+        Возвращает словарь {поле: {компонента: {'linf', 'l2'}}, 'energy': ...} """
     a = config['geometry']['radius_min']
     b = config['geometry']['radius_max']
     p1 = config['bcs']['pressure_inner']
     p2 = config['bcs']['pressure_outer']
-    L_an = AnaliticalLameStress(a,b,p1,p2)
+    L_an = AnaliticalLameSolution(a, b, p1, p2, config['material']['E'], config['material']['Nu'])
 
     resolution = config['mesh']['resolution']
 
-    def metr(a,b):
-        if a!=0 and b!=0:
-            return abs(a-b)/sqrt(a**2+b**2)
-        return abs(a-b)
+    rng = np.random.default_rng(seed)
+    r = np.sqrt(rng.uniform(a**2, b**2, samples))
+    fi = rng.uniform(0, pi/2, samples)
+    points = np.stack([r*np.cos(fi), r*np.sin(fi)], axis=1)
 
+    points = points[solution.grid.locate(points) >= 0]
 
-    error = [[],[],[]]
+    s_cl = solution.evaluate(points)
+    s_an = L_an(points[:,0], points[:,1])
 
-    for i in range(11):
+    # погрешность компоненты относится к норме всего поля, а не той же компоненты:
+    # аналитическая компонента может быть нулевой (например, xy при равных давлениях)
+    report = {}
+    for field, components in FIELDS.items():
+        error = s_cl[field] - s_an[field]
+        scale_linf = np.abs(s_an[field]).max()
+        scale_l2 = (s_an[field]**2).mean()
+        report[field] = {
+            component: {
+                'linf': np.abs(error[:,i]).max()/scale_linf,
+                'l2': np.sqrt((error[:,i]**2).mean()/scale_l2),
+            }
+            for i, component in enumerate(components)
+        }
 
-        r = a+i/10*(b-a)
-
-        s_an = L_an(r)
-
-        s_cl = [float(solution(r,0)['stress'][i]) for i in range(3)]
-    
-        for i in range(3):
-            error[i].append(metr(s_cl[i],s_an[i]))
-
-        # print(
-        #     round(s_cl[0],3),
-        #     round(s_an[0],3),'\t\t',
-        #     round(s_cl[1],3),
-        #     round(s_an[1],3),'\t\t',
-        #     round(s_cl[2],3),
-        #     round(s_an[2],3),
-        # )
+    # энергетическая норма: интеграл свертки погрешностей напряжений и деформаций (деформация сдвига - инженерная)
+    energy = np.einsum('ij,ij->', s_cl['stress']-s_an['stress'], s_cl['strain']-s_an['strain'])
+    report['energy'] = np.sqrt(energy/np.einsum('ij,ij->', s_an['stress'], s_an['strain']))
 
     global now
 
     print('Точность', resolution, "(",solution.len,"точек )", 'время', round(time.time()-now,1))
-    print('rr погрешность - ', round(100*sum(error[0])/10,1),'%')
-    print('ff погрешность - ', round(100*sum(error[1])/10,1),'%')
-    print('rf погрешность - ', round(100*sum(error[2])/10,1),'%')
+    print('Проверка в', len(points), 'случайных точках, погрешность L-inf / L2:')
+    for field, components in FIELDS.items():
+        print(' ', field, ', '.join(
+            f"{component} {100*report[field][component]['linf']:.2f}% / {100*report[field][component]['l2']:.2f}%"
+            for component in components
+        ))
+    print('  энергетическая норма', f"{100*report['energy']:.2f}%")
     now = time.time()
 
+    return report
+
 
 def AnaliticalLameStress(a,b,p1,p2):
+    """ Аналитические напряжения (rr, ff, rf) в кольце a < r < b под давлениями p1 изнутри и p2 снаружи;
+        r - число или массив """
     def result(r):
         return [
             p1*a**2/(b**2-a**2)*(1-b**2/r**2) - p2*b**2/(b**2-a**2)*(1-a**2/r**2),
             p1*a**2/(b**2-a**2)*(1+b**2/r**2) - p2*b**2/(b**2-a**2)*(1+a**2/r**2),
-            0
+            np.zeros_like(r),
         ]
-    return result
\ No newline at end of file
+    return result
+
+
+def AnaliticalLameSolution(a,b,p1,p2,E,Nu):
+    """ Аналитическое решение задачи Ламе (плоская деформация) в декартовых координатах, как у Solution.evaluate:
+        по массивам координат x, y возвращает displacement (M, 2), strain и stress (M, 3) """
+    L_stress = AnaliticalLameStress(a,b,p1,p2)
+
+    def result(x, y):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        r = np.hypot(x, y)
+        c, s = x/r, y/r
+
+        s_rr, s_ff, _ = L_stress(r)
+
+        # закон Гука для плоской деформации, перемещение u_r = r*e_ff
+        e_rr = (1+Nu)/E*((1-Nu)*s_rr - Nu*s_ff)
+        e_ff = (1+Nu)/E*((1-Nu)*s_ff - Nu*s_rr)
+        u_r = r*e_ff
+
+        def cartesian(t_rr, t_ff, shear):
+            return np.stack([t_rr*c**2 + t_ff*s**2, t_rr*s**2 + t_ff*c**2, shear*(t_rr-t_ff)*s*c], axis=1)
+
+        return {
+            "displacement": np.stack([u_r*c, u_r*s], axis=1),
+            "strain": cartesian(e_rr, e_ff, 2),
+            "stress": cartesian(s_rr, s_ff, 1),
+        }
+
+    return result
@@ -1,12 +1,50 @@
-from copy import copy
+from collections.abc import MutableMapping
 
 import base64
+import re
 import zlib
 
 import numpy as np
 import xml.etree.cElementTree as ET
 
 
+class LazyArrays(MutableMapping):
+    """ Словарь массивов vtu файла: массив, добавленный через add, декодируется при первом обращении и запоминается """
+
+    def __init__(self):
+        self._items = {}
+        self._loaders = {}
+
+    def add(self, key, loader):
+        self._items[key] = None
+        self._loaders[key] = loader
+
+    def load_all(self):
+        for key in self:
+            value = self[key]
+            if isinstance(value, LazyArrays):
+                value.load_all()
+
+    def __getitem__(self, key):
+        if key in self._loaders:
+            self._items[key] = self._loaders.pop(key)()
+        return self._items[key]
+
+    def __setitem__(self, key, value):
+        self._loaders.pop(key, None)
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        self._loaders.pop(key, None)
+        del self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
 class VTUReader:
 
 
@@ -60,36 +98,38 @@ class VTUReader:
     }
 
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, lazy: bool = False):
+        """ lazy=True - при открытии читается только xml заголовок и запоминаются положения массивов в файле,
+            а каждый массив декодируется при первом обращении к нему """
+
+        self.filename = filename
 
-        with open(filename, 'r') as file_read:
+        with open(filename, 'rb') as file_read:
             self.tree = self.scan_file(file_read)
 
         PointData = self.tree['Piece']['PointData']
         CellData = self.tree['Piece']['CellData']
-        Points = self.tree['Piece']['Points']
         Cells = self.tree['Piece']['Cells']
 
-        point_data = copy(PointData)
-
-        for key in point_data:
+        for key in list(PointData):
             if 'Node' in key:
                 del PointData[key]
 
-        self.cells = {
-            **CellData, 
-            "types":Cells['types'],
-            "nodes": np.split(Cells['connectivity'], Cells['offsets'])
-        }
+        self.cells = CellData
+        self.cells.add("types", lambda: Cells['types'])
+        self.cells.add("nodes", lambda: np.split(Cells['connectivity'], Cells['offsets']))
 
-        self.points = Points['Points']['data']
         self.point_data = PointData
-        for attr in self.point_data:
-            attr_data = self.point_data[attr]
-            if 'X' in attr_data and 'Y' in attr_data and 'Z' in attr_data and 'Magnitude' not in attr_data:
-                self.point_data[attr]['Magnitude'] = (attr_data['X']**2 + attr_data['Y']**2 + attr_data['Z']**2)**(1/2)
 
-        pass
+        self._extremes = None
+
+        if not lazy:
+            for data in self.tree.values():
+                data.load_all()
+
+    @property
+    def points(self):
+        return self.tree['Piece']['Points']['Points']['data']
 
     @property
     def elements_count(self):
@@ -105,25 +145,40 @@ class VTUReader:
 
 
     def scan_file(self, file_read):
+        """ Разобрать xml заголовок и запомнить положение каждого массива в файле, не читая сами данные """
 
-        head = ""
+        head = b""
+        line_start = 0
         for line in file_read:
-            if '<AppendedData' in line:
-                head += '</VTKFile>'
+            if b'<AppendedData' in line:
+                head += b'</VTKFile>'
                 break
             head += line
+            line_start += len(line)
         head = ET.fromstring(head)
 
         assert head.attrib["type"] == "UnstructuredGrid"
 
-        UnstructuredGrid = head[0]
+        self.header_type = head.attrib.get('header_type', 'UInt32')
+        self.compressed = 'compressor' in head.attrib
+        self.encoding = re.search(rb'encoding="(\w+)"', line).group(1).decode()
 
-        offset_map = self._scan_offset_map(UnstructuredGrid)
+        assert self.encoding in ['base64', 'raw'], f'unknown appended data encoding {self.encoding}'
 
-        while file_read.read(1) == ' ':
-            pass
+        # данные начинаются сразу за символом '_', который может стоять и в строке с тегом, и на следующей
+        tag_end = line.index(b'>', line.index(b'<AppendedData')) + 1
+        if b'_' in line[tag_end:]:
+            self.data_start = line_start + tag_end + line[tag_end:].index(b'_') + 1
+        else:
+            while file_read.read(1) != b'_':
+                pass
+            self.data_start = file_read.tell()
 
-        return self._scan_tree(UnstructuredGrid, offset_map, file_read)
+        UnstructuredGrid = head[0]
+
+        offset_map = sorted(self._scan_offset_map(UnstructuredGrid))
+
+        return self._scan_tree(UnstructuredGrid, offset_map)
 
     def _scan_offset_map(self, xml):
         offsets = []
@@ -134,8 +189,8 @@ class VTUReader:
                 offsets.extend(self._scan_offset_map(leaf))
         return offsets
 
-    def _scan_tree(self, xml, offset_map, source_file):
-        data = {}
+    def _scan_tree(self, xml, offset_map):
+        data = LazyArrays()
         for leaf in xml:
             if 'offset' in leaf.attrib:
                 assert leaf.tag in ['Array', 'DataArray']
@@ -143,61 +198,110 @@ class VTUReader:
 
                 offset = int(leaf.attrib['offset'])
                 index = offset_map.index(offset)
-                if index < len(offset_map) - 1:
-                    block = source_file.read(
-                        offset_map[offset_map.index(offset) + 1] - offset)
-                else:
-                    block = source_file.readline()[:-1]
+                end = offset_map[index + 1] if index < len(offset_map) - 1 else None
 
                 if leaf.tag == 'DataArray':
-                    data[leaf.attrib['Name']] = self._convert_data_array(block, leaf.attrib)
+                    data.add(leaf.attrib['Name'], self._array_loader(offset, end, leaf.attrib))
             else:
-                data[leaf.tag] = self._scan_tree(leaf, offset_map, source_file)
+                data[leaf.tag] = self._scan_tree(leaf, offset_map)
         return data
 
+    def _array_loader(self, offset, end, attrib):
+        def load():
+            with open(self.filename, 'rb') as file_read:
+                file_read.seek(self.data_start + offset)
+
+                if self.encoding == 'raw':
+                    data_block = self._decode_raw_block(file_read, attrib['type'], self.header_type, self.compressed)
+                else:
+                    block = file_read.read(end - offset) if end is not None else file_read.readline().rstrip()
+                    data_block = self._decode_data_block(block, attrib['type'], self.header_type, self.compressed)
+
+            return self._convert_data_array(data_block, attrib)
+        return load
+
     @staticmethod
-    def _decode_data_block(data, data_type, header_type='UInt32'):
-        # using dark magic
-        def vtu_to_np_type(name):
-            return np.dtype(getattr(np, name.lower()))
+    def _vtu_to_np_type(name):
+        return np.dtype(getattr(np, name.lower())).newbyteorder('<')
 
+    @staticmethod
+    def _decompress_blocks(header, read, dtype):
+        """ Распаковать zlib блоки, описанные заголовком [число блоков, размер блока, размер последнего блока,
+            размеры сжатых блоков...], прямо в заранее выделенный выходной буфер """
+        num_blocks, block_size, last_size = (int(x) for x in header[:3])
+        block_sizes = header[3:3+num_blocks]
+
+        if num_blocks == 0:
+            return np.zeros(0, dtype=dtype)
+
+        total = (num_blocks - 1)*block_size + (last_size or block_size)
+        output = np.empty(total, dtype=np.uint8)
+
+        position = 0
+        for size in block_sizes:
+            block = zlib.decompress(read(int(size)))
+            output[position:position+len(block)] = np.frombuffer(block, dtype=np.uint8)
+            position += len(block)
+
+        return output.view(dtype)
+
+    @staticmethod
+    def _decode_data_block(data, data_type, header_type='UInt32', compressed=True):
+        # using dark magic
         def num_bytes_to_num_base64_chars(num_bytes):
             return -(-num_bytes // 3) * 4
 
-        dtype = vtu_to_np_type(header_type)
-        num_bytes_per_item = np.dtype(dtype).itemsize
+        if isinstance(data, str):
+            data = data.encode()
+
+        header_dtype = VTUReader._vtu_to_np_type(header_type)
+        dtype = VTUReader._vtu_to_np_type(data_type)
+
+        num_bytes_per_item = header_dtype.itemsize
+
+        if not compressed:
+            # без сжатия заголовок (число байт) кодируется в base64 вместе с данными
+            byte_string = base64.b64decode(data)
+            return np.frombuffer(byte_string, dtype, offset=num_bytes_per_item)
+
         num_chars = num_bytes_to_num_base64_chars(num_bytes_per_item)
         byte_string = base64.b64decode(data[:num_chars])[:num_bytes_per_item]
-        num_blocks = np.frombuffer(byte_string, dtype)[0]
+        num_blocks = int(np.frombuffer(byte_string, header_dtype)[0])
 
         num_header_items = 3 + num_blocks
         num_header_bytes = num_bytes_per_item * num_header_items
         num_header_chars = num_bytes_to_num_base64_chars(num_header_bytes)
         byte_string = base64.b64decode(data[:num_header_chars])
-        header = np.frombuffer(byte_string, dtype)
+        header = np.frombuffer(byte_string, header_dtype)
+
+        byte_array = memoryview(base64.b64decode(data[num_header_chars:]))
+
+        position = [0]
+        def read(size):
+            position[0] += size
+            return byte_array[position[0]-size:position[0]]
 
-        block_sizes = header[3:]
+        return VTUReader._decompress_blocks(header, read, dtype)
 
-        byte_array = base64.b64decode(data[num_header_chars:])
-        dtype = vtu_to_np_type(data_type)
+    @staticmethod
+    def _decode_raw_block(file_read, data_type, header_type='UInt32', compressed=True):
+        """ Декодировать массив из appended данных в кодировке raw, начиная с текущей позиции файла """
+        header_dtype = VTUReader._vtu_to_np_type(header_type)
+        dtype = VTUReader._vtu_to_np_type(data_type)
+
+        def read_header(count):
+            return np.frombuffer(file_read.read(count*header_dtype.itemsize), header_dtype)
 
-        byte_offsets = np.empty(block_sizes.shape[0] + 1, dtype=block_sizes.dtype)
-        byte_offsets[0] = 0
-        np.cumsum(block_sizes, out=byte_offsets[1:])
+        if not compressed:
+            num_bytes = int(read_header(1)[0])
+            return np.frombuffer(file_read.read(num_bytes), dtype)
 
-        # process the compressed data
-        block_data = np.concatenate([
-            np.frombuffer(
-                zlib.decompress(byte_array[byte_offsets[k]: byte_offsets[k + 1]]),
-                dtype=dtype,
-            )
-            for k in range(num_blocks)
-        ])
+        num_blocks = int(read_header(1)[0])
+        header = np.concatenate([[num_blocks], read_header(2 + num_blocks)])
 
-        return block_data
+        return VTUReader._decompress_blocks(header, file_read.read, dtype)
 
-    def _convert_data_array(self, block, attrib):
-        data_block = self._decode_data_block(block, attrib['type'], "UInt32")
+    def _convert_data_array(self, data_block, attrib):
 
         if 'NumberOfComponents' in attrib:
             dim = int(attrib['NumberOfComponents'])
@@ -214,10 +318,11 @@ class VTUReader:
                     columns = ['X', 'Y', 'Z']
                 else:
                     columns = ['Magnitude', 'X', 'Y', 'Z']
-                    m = np.apply_along_axis(
-                        lambda x: [(x[0] ** 2 + x[1] ** 2 + x[2] ** 2) ** 0.5],
-                        1, data)
-                    data = np.hstack([m, data])
+                    # модуль считается один раз при декодировании и хранится первой колонкой
+                    vectors = data
+                    data = np.empty((len(vectors), 4), dtype=np.result_type(vectors.dtype, np.float32))
+                    data[:,1:] = vectors
+                    data[:,0] = np.sqrt(np.einsum('ij,ij->i', data[:,1:], data[:,1:]))
 
             return {'columns':columns, 'data':data}
 
@@ -226,32 +331,57 @@ class VTUReader:
 
     @property
     def extremes(self):
+        """ Минимум и максимум каждой компоненты узловых полей с номером и координатами узла.
+            Все компоненты массива обрабатываются одним вызовом argmin/argmax, результат запоминается """
+
+        if self._extremes is not None:
+            return self._extremes
 
         extremes = {}
         attrs = self.attrs
         for attr in attrs:
-            extremes[attr] = {}
-            for i, axis in enumerate(attrs[attr]):
-                column = self.point_data[attr]['data'][:,i]
+            data = self.point_data[attr]['data']
+
+            argmins = data.argmin(axis=0)
+            argmaxs = data.argmax(axis=0)
+            mins = data[argmins, np.arange(data.shape[1])]
+            maxs = data[argmaxs, np.arange(data.shape[1])]
 
-                argmin = column.argmin()
-                argmax = column.argmax()
+            min_points = self.points[argmins].tolist()
+            max_points = self.points[argmaxs].tolist()
 
+            extremes[attr] = {}
+            for i, axis in enumerate(attrs[attr]):
                 extremes[attr][axis] = {
                     'min': {
-                        'node': argmin,
-                        'point': self.points[argmin].tolist(),
-                        'value': column.min()
+                        'node': argmins[i],
+                        'point': min_points[i],
+                        'value': mins[i]
                     },
                     'max': {
-                        'node': argmax,
-                        'point': self.points[argmax].tolist(),
-                        'value': column.max()
+                        'node': argmaxs[i],
+                        'point': max_points[i],
+                        'value': maxs[i]
                     },
                 }
 
+        self._extremes = extremes
         return extremes
 
+    def percentiles(self, q=(1, 5, 25, 50, 75, 95, 99)):
+        """ Перцентили q (в процентах) каждой компоненты узловых полей: {поле: {компонента: {q: значение}}} """
+
+        summary = {}
+        attrs = self.attrs
+        for attr in attrs:
+            values = np.percentile(self.point_data[attr]['data'], q, axis=0)
+            summary[attr] = {
+                axis: dict(zip(q, values[:,i].tolist()))
+                for i, axis in enumerate(attrs[attr])
+            }
+
+        return summary
+
 
     @property
     def attrs(self):
@@ -271,4 +401,5 @@ if __name__ == '__main__':
 
     # points = result_vtu.points
     print(result_vtu.extremes)
+    print(result_vtu.percentiles())
     
\ No newline at end of file
@@ -0,0 +1,103 @@
+import base64
+import zlib
+
+import numpy as np
+
+
+VTK_TRIANGLE = 5
+VTK_QUADRATIC_TRIANGLE = 22
+
+
+def encode_data_block(array, level=6, block_size=1<<15):
+    """ Кодирование массива в формат appended base64 + zlib, который понимает VTUReader._decode_data_block:
+        заголовок UInt32 [число блоков, размер блока, размер последнего блока, размеры сжатых блоков...]
+        и сжатые блоки кодируются в base64 по отдельности. Блоки нарезаются из непрерывного буфера без копирования """
+    buffer = memoryview(np.ascontiguousarray(array)).cast('B')
+
+    blocks = [zlib.compress(buffer[start:start+block_size], level) for start in range(0, len(buffer), block_size)]
+
+    last_size = len(buffer) - (len(blocks)-1)*block_size if blocks else 0
+
+    header = np.array([len(blocks), block_size, last_size] + [len(block) for block in blocks], dtype='<u4')
+
+    return base64.b64encode(header.tobytes()) + base64.b64encode(b''.join(blocks))
+
+
+def data_array(name, array, offset, components=None):
+    """ Описание DataArray для заголовка vtu """
+    type_name = {'f': 'Float', 'i': 'Int', 'u': 'UInt'}[array.dtype.kind] + str(8*array.dtype.itemsize)
+
+    attrs = f'type="{type_name}" Name="{name}"'
+    if array.ndim > 1:
+        attrs += f' NumberOfComponents="{array.shape[1]}"'
+    for i, component in enumerate(components or []):
+        attrs += f' ComponentName{i}="{component}"'
+
+    return f'<DataArray {attrs} format="appended" offset="{offset}"/>'
+
+
+def pad3(vectors):
+    """ Дополнить двумерные векторы нулевой компонентой z """
+    return np.column_stack([vectors, np.zeros(len(vectors))])
+
+
+def solution2vtu(solution, file, level=6, block_size=1<<15):
+    """ Записать Solution в vtu файл (UnstructuredGrid из TRI3 или TRI6 элементов) с полями:
+        узловые Displacement и восстановленный Stress, по элементам - Strain и Stress.
+        file - путь или открытый текстовый файл; level и block_size - параметры сжатия zlib """
+
+    if isinstance(file, str):
+        with open(file, "w") as write_file:
+            return solution2vtu(solution, write_file, level, block_size)
+
+    elems = np.asarray(solution.elems)
+    cell_type = VTK_TRIANGLE if elems.shape[1] == 3 else VTK_QUADRATIC_TRIANGLE
+    tensor = ['XX', 'YY', 'XY']
+
+    # порядок секций совпадает с порядком чтения в VTUReader: PointData, CellData, Points, Cells
+    sections = [
+        ('PointData', [
+            ('Displacement', pad3(solution.node_displacements).astype('<f8'), None),
+            ('Stress', solution.node_stress.astype('<f8'), tensor),
+        ]),
+        ('CellData', [
+            ('Strain', solution.elem_strain.astype('<f8'), tensor),
+            ('Stress', solution.elem_stress.astype('<f8'), tensor),
+        ]),
+        ('Points', [
+            ('Points', pad3(solution.nodes).astype('<f8'), None),
+        ]),
+        ('Cells', [
+            ('connectivity', elems.ravel().astype('<i8'), None),
+            ('offsets', (elems.shape[1]*np.arange(1, len(elems)+1)).astype('<i8'), None),
+            ('types', np.full(len(elems), cell_type, dtype='<u1'), None),
+        ]),
+    ]
+
+    head = []
+    blocks = []
+    offset = 0
+
+    for section, arrays in sections:
+        head.append(f'      <{section}>')
+        for name, array, components in arrays:
+            block = encode_data_block(array, level, block_size)
+            head.append('        '+data_array(name, array, offset, components))
+            blocks.append(block)
+            offset += len(block)
+        head.append(f'      </{section}>')
+
+    file.write('<?xml version="1.0"?>\n')
+    file.write('<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt32" compressor="vtkZLibDataCompressor">\n')
+    file.write('  <UnstructuredGrid>\n')
+    file.write(f'    <Piece NumberOfPoints="{len(solution.nodes)}" NumberOfCells="{len(elems)}">\n')
+    file.write('\n'.join(head)+'\n')
+    file.write('    </Piece>\n')
+    file.write('  </UnstructuredGrid>\n')
+    file.write('  <AppendedData encoding="base64">\n')
+    file.write('   _')
+    for block in blocks:
+        file.write(block.decode('ascii'))
+    file.write('\n')
+    file.write('  </AppendedData>\n')
+    file.write('</VTKFile>\n')